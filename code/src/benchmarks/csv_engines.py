@@ -0,0 +1,86 @@
+"""Benchmark the CSV engines on a large synthetic hospital file.
+
+Writes a ``Train.csv``-shaped file with ``--rows`` rows (unless ``--path``
+points at an existing file), then reads it with every engine through
+``read_input`` in a fresh process each, and reports the load time, the peak
+resident memory added by the read and the size of the resulting frame.
+
+Usage:
+    python benchmarks/csv_engines.py --rows 5000000
+    python benchmarks/csv_engines.py --path data/Train.csv
+"""
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sua_outsmarting_outbreaks.data.csv_reader import CSV_ENGINES
+from sua_outsmarting_outbreaks.data.data_prep import read_input
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Share of synthetic hospital rows with a missing Total, as in Train.csv
+MISSING_TOTAL_SHARE = 0.05
+
+
+def write_hospitals(path: Path, rows: int, seed: int) -> None:
+    """Write a synthetic hospital CSV with the columns and cardinalities of ``Train.csv``."""
+    rng = np.random.default_rng(seed)
+    locations = rng.integers(0, 5_000, rows)
+    pd.DataFrame(
+        {
+            "ID": [f"ID_{i}" for i in range(rows)],
+            "Total": np.where(rng.random(rows) < MISSING_TOTAL_SHARE, np.nan, rng.poisson(3, rows)),
+            "Location": [f"L{i}" for i in locations],
+            "Category_Health_Facility_UUID": [f"U{i}" for i in locations],
+            "Disease": rng.choice(["Cholera", "Typhoid", "Diarrhea", "Malaria"], rows),
+            "Month": rng.integers(1, 13, rows),
+            "Year": rng.integers(2019, 2024, rows),
+            "Transformed_Latitude": rng.uniform(-10, 10, rows),
+            "Transformed_Longitude": rng.uniform(20, 40, rows),
+        }
+    ).to_csv(path, index=False)
+
+
+def measure(path: str, engine: str) -> tuple[float, float, float]:
+    """Read the file with one engine and return (seconds, peak RSS added in MB, frame MB)."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    df = read_input(path, "train", engine=engine)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return seconds, (peak - baseline) / 1024, df.memory_usage(deep=True).sum() / 1e6
+
+
+def main() -> None:
+    """Run the benchmark and log one line per engine."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", help="Existing hospital CSV to read instead of a synthetic one")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Rows of the synthetic file")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    # Every step runs in its own process: the peak RSS of a parent carries over into spawned children
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.path) if args.path else Path(tmp) / "Train.csv"
+        if not args.path:
+            with context.Pool(1) as pool:
+                pool.apply(write_hospitals, (path, args.rows, args.seed))
+        logger.info(f"{path}: {path.stat().st_size / 1e6:.0f} MB")
+
+        for engine in CSV_ENGINES:
+            with context.Pool(1) as pool:
+                seconds, peak_mb, frame_mb = pool.apply(measure, (str(path), engine))
+            logger.info(f"  {engine:<8} {seconds:7.2f}s  peak RSS +{peak_mb:7.0f} MB  frame {frame_mb:7.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
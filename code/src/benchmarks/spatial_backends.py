@@ -0,0 +1,83 @@
+"""Micro-benchmark of the nearest-neighbour backends.
+
+Reports build time, single-neighbour query throughput and the serialized size
+of each backend. With ``--data-dir`` the supplementary site coordinates and
+the hospital locations from the raw input files are used; otherwise uniform
+random points are generated at each ``--sizes`` value.
+
+Usage:
+    python benchmarks/spatial_backends.py --data-dir data
+    python benchmarks/spatial_backends.py --sizes 10000 100000 1000000 --queries 100000
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from sua_outsmarting_outbreaks.data.data_prep import read_input
+from sua_outsmarting_outbreaks.data.schema import RAW_FILES, SUPPLEMENTARY_PREFIXES
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+from sua_outsmarting_outbreaks.utils.spatial_backends import SPATIAL_BACKENDS, build_backend, select_backend
+
+logger = setup_logger(__name__)
+
+
+def load_points(data_dir: str) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Read the site coordinates of each supplementary dataset and the distinct hospital locations."""
+    sites = {}
+    for name, prefix in SUPPLEMENTARY_PREFIXES.items():
+        columns = [f"{prefix}_Transformed_Latitude", f"{prefix}_Transformed_Longitude"]
+        df = read_input(f"{data_dir}/{RAW_FILES[name]}", name, usecols=columns)
+        points = df[columns].to_numpy(dtype=float)
+        sites[name] = points[np.isfinite(points).all(axis=1)]
+    hospitals = read_input(
+        f"{data_dir}/{RAW_FILES['train']}", "train", usecols=["Transformed_Latitude", "Transformed_Longitude"]
+    ).to_numpy(dtype=float)
+    hospitals = np.unique(hospitals[np.isfinite(hospitals).all(axis=1)], axis=0)
+    return sites, hospitals
+
+
+def benchmark(points: np.ndarray, queries: np.ndarray, label: str) -> None:
+    """Build every backend over ``points``, query it and log the measurements."""
+    selected = select_backend(points, len(queries))
+    logger.info(f"{label}: {len(points)} points, {len(queries)} queries, auto selects '{selected}'")
+    for backend in SPATIAL_BACKENDS[1:]:
+        start = time.perf_counter()
+        index = build_backend(points, backend)
+        built = time.perf_counter()
+        # Only the KD-tree threads its queries; keep it single-threaded like the other backends
+        index.query(queries, **({"workers": 1} if isinstance(index, cKDTree) else {}))
+        queried = time.perf_counter()
+        size_mb = len(pickle.dumps(index)) / 1e6
+        logger.info(
+            f"  {backend:<9} build {built - start:7.3f}s  "
+            f"query {len(queries) / (queried - built):12,.0f}/s  size {size_mb:8.1f} MB"
+        )
+
+
+def main() -> None:
+    """Run the benchmark on the input data or on synthetic uniform points."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", help="Directory with the raw input CSV files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="Synthetic sizes")
+    parser.add_argument("--queries", type=int, default=100_000, help="Synthetic query count")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        sites, hospitals = load_points(args.data_dir)
+        for name, points in sites.items():
+            benchmark(points, hospitals, name)
+        return
+
+    rng = np.random.default_rng(args.seed)
+    queries = rng.uniform(0, 1, (args.queries, 2))
+    for size in args.sizes:
+        benchmark(rng.uniform(0, 1, (size, 2)), queries, f"uniform {size}")
+
+
+if __name__ == "__main__":
+    main()
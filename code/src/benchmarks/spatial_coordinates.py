@@ -0,0 +1,93 @@
+"""Benchmark planar vs geodesic nearest-site matching.
+
+Compares the speed of the planar KD-tree, the 3D unit-vector KD-tree and a
+haversine BallTree, and measures how often the planar mode picks a different
+site than the true great-circle nearest neighbour.
+
+Usage:
+    python benchmarks/spatial_coordinates.py --sites 50000 --queries 200000 --lat-min 40 --lat-max 70
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+from sua_outsmarting_outbreaks.utils.spatial import EARTH_RADIUS_KM, SpatialTarget, spatial_join
+
+logger = setup_logger(__name__)
+
+
+def random_points(rng: np.random.Generator, n: int, lat_min: float, lat_max: float) -> np.ndarray:
+    """Draw (lat, lon) degree pairs in a latitude band, with longitudes spanning 20 degrees."""
+    return np.column_stack([rng.uniform(lat_min, lat_max, n), rng.uniform(0, 20, n)])
+
+
+def timed_join(hospitals: pd.DataFrame, sites: pd.DataFrame, mode: str) -> tuple[pd.DataFrame, float]:
+    """Run a single-target join and return the matches with the elapsed seconds."""
+    target = SpatialTarget("site", sites, "lat", "lon")
+    start = time.perf_counter()
+    matches = spatial_join(hospitals, [target], coordinate_mode=mode)
+    return matches, time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark and log timings and planar-mode accuracy."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=50_000, help="Number of reference sites")
+    parser.add_argument("--queries", type=int, default=200_000, help="Number of query points")
+    parser.add_argument("--lat-min", type=float, default=40.0, help="Southern edge of the latitude band")
+    parser.add_argument("--lat-max", type=float, default=70.0, help="Northern edge of the latitude band")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    sites = pd.DataFrame(random_points(rng, args.sites, args.lat_min, args.lat_max), columns=["lat", "lon"])
+    hospitals = pd.DataFrame(
+        random_points(rng, args.queries, args.lat_min, args.lat_max),
+        columns=["Transformed_Latitude", "Transformed_Longitude"],
+    )
+
+    planar, planar_seconds = timed_join(hospitals, sites, "planar")
+    geodesic, geodesic_seconds = timed_join(hospitals, sites, "geodesic")
+
+    start = time.perf_counter()
+    ball_tree = BallTree(np.radians(sites.to_numpy()), metric="haversine")
+    ball_distances, ball_rows = ball_tree.query(np.radians(hospitals.to_numpy()), k=1)
+    ball_seconds = time.perf_counter() - start
+
+    # The haversine BallTree is the exact great-circle reference
+    truth_rows = ball_rows[:, 0]
+    truth_km = ball_distances[:, 0] * EARTH_RADIUS_KM
+    geodesic_agree = (geodesic["site_nearest_row"].to_numpy() == truth_rows).mean()
+    planar_wrong = planar["site_nearest_row"].to_numpy() != truth_rows
+
+    # Great-circle distance to the site the planar mode picked
+    picked = np.radians(sites.to_numpy()[planar["site_nearest_row"].to_numpy()])
+    query = np.radians(hospitals.to_numpy())
+    h = (
+        np.sin((picked[:, 0] - query[:, 0]) / 2) ** 2
+        + np.cos(query[:, 0]) * np.cos(picked[:, 0]) * np.sin((picked[:, 1] - query[:, 1]) / 2) ** 2
+    )
+    planar_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+    logger.info(f"{args.queries} queries against {args.sites} sites, latitudes {args.lat_min}-{args.lat_max}")
+    logger.info(f"planar KD-tree:        {planar_seconds:.3f}s")
+    logger.info(f"geodesic KD-tree (3D): {geodesic_seconds:.3f}s")
+    logger.info(f"haversine BallTree:    {ball_seconds:.3f}s")
+    logger.info(f"geodesic mode agrees with the exact nearest site for {geodesic_agree:.2%} of queries")
+    logger.info(f"planar mode picks a different site for {planar_wrong.mean():.2%} of queries")
+    if planar_wrong.any():
+        excess = planar_km[planar_wrong] - truth_km[planar_wrong]
+        logger.info(f"planar excess distance on those: mean {excess.mean():.3f} km, max {excess.max():.3f} km")
+    logger.info(
+        "max geodesic distance error: "
+        f"{np.abs(geodesic['site_nearest_distance'].to_numpy() - truth_km).max():.2e} km"
+    )
+
+
+if __name__ == "__main__":
+    main()
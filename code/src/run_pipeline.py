@@ -38,6 +38,11 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Use S3 storage instead of local filesystem (default: False)",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute data preparation even if the processed data is up to date",
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -58,13 +63,13 @@ def main() -> None:
             logger.info("Running data preparation...")
             if args.use_s3:
                 logger.info("Using S3 storage for data")
-                preprocess_data(local_data_dir=None, output_dir=None)
+                preprocess_data(local_data_dir=None, output_dir=None, force=args.force)
             else:
                 logger.info("Using local filesystem for data (use --use-s3 flag to use S3 instead)")
                 if not args.local_data or not args.output_dir:
                     logger.error("When using local mode, --local-data and --output-dir are required")
                     sys.exit(1)
-                preprocess_data(local_data_dir=args.local_data, output_dir=args.output_dir)
+                preprocess_data(local_data_dir=args.local_data, output_dir=args.output_dir, force=args.force)
         elif args.stage == "train":
             logger.info("Running model training...")
             train_model(data_dir=args.output_dir)
@@ -80,7 +85,7 @@ def main() -> None:
             if args.use_s3:
                 logger.info("Using S3 storage for data")
                 # First prepare the data
-                preprocess_data(local_data_dir=None, output_dir=None)
+                preprocess_data(local_data_dir=None, output_dir=None, force=args.force)
                 # Then train the model
                 train_model(data_dir=None)
                 # Then evaluate
@@ -93,7 +98,7 @@ def main() -> None:
                     logger.error("When using local mode, --local-data and --output-dir are required")
                     sys.exit(1)
                 # First prepare the data
-                preprocess_data(local_data_dir=args.local_data, output_dir=args.output_dir)
+                preprocess_data(local_data_dir=args.local_data, output_dir=args.output_dir, force=args.force)
                 # Then train the model
                 train_model(data_dir=args.output_dir)
                 # Then evaluate
@@ -27,10 +27,11 @@ def download(output_dir: str) -> None:
 @cli.command()
 @click.option("--local-data", type=click.Path(), help="Local directory for input data")
 @click.option("--output-dir", type=click.Path(), help="Local directory for output")
-def prepare(local_data: str | None, output_dir: str | None) -> None:
+@click.option("--force", is_flag=True, help="Recompute even if the processed data is up to date")
+def prepare(local_data: str | None, output_dir: str | None, *, force: bool) -> None:
     """Run data preparation step."""
-    logger.info(f"Running data preparation with local_data={local_data}, output_dir={output_dir}")
-    preprocess_data(local_data_dir=local_data, output_dir=output_dir)
+    logger.info(f"Running data preparation with local_data={local_data}, output_dir={output_dir}, force={force}")
+    preprocess_data(local_data_dir=local_data, output_dir=output_dir, force=force)
 
 @cli.command()
 @click.option("--input-dir", type=click.Path(), help="Directory with processed training data")
@@ -0,0 +1,272 @@
+"""Fingerprint-based caching of data preparation outputs.
+
+The fingerprint combines cheap file metadata of every raw input (ETag, size
+and modification time, never a full content hash) with the settings that
+affect the processed output. It is stored in a manifest next to the processed
+dataset so later runs can reuse the dataset when nothing has changed.
+
+The manifest also records a content hash of the inputs of every output month.
+When only some months changed, ``changed_periods`` tells the caller which
+``Year=…/Month=…`` partitions to recompute instead of rebuilding everything.
+"""
+
+import hashlib
+import json
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import fsspec
+import numpy as np
+import pandas as pd
+
+from sua_outsmarting_outbreaks.data.schema import RAW_FILES
+from sua_outsmarting_outbreaks.data.storage import CSV_SPLITS, PROCESSED_DATASET
+from sua_outsmarting_outbreaks.utils.config import settings
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+from sua_outsmarting_outbreaks.utils.spatial import month_year_to_period, year_month_to_period
+
+logger = setup_logger(__name__)
+
+# Bump when the processing logic changes in a way that invalidates existing outputs
+PROCESSING_VERSION = 2
+
+MANIFEST_NAME = "processed_manifest.json"
+
+# File metadata fields used for the fingerprint, as reported by fsspec for local files and S3
+METADATA_FIELDS = ("ETag", "size", "mtime", "LastModified")
+
+# Settings that only affect speed, not the processed output
+RUNTIME_SETTINGS = {
+    "query_workers",
+    "load_workers",
+    "index_cache",
+    "index_cache_dir",
+    "spatial_backend",
+    "recall_sample",
+    "incremental",
+    "feature_cache",
+    "chunk_rows",
+    "prep_processes",
+    "csv_engine",
+}
+
+
+def _join(base: str | Path, name: str) -> str:
+    """Join a local directory or S3 prefix with a relative name."""
+    return f"{str(base).rstrip('/')}/{name}"
+
+
+def file_metadata(path: str | Path) -> dict[str, str]:
+    """Get the fingerprint metadata of a local or S3 file.
+
+    Args:
+        path: Local path or S3 URI
+
+    Returns:
+        Mapping of metadata field to value
+
+    """
+    fs, fs_path = fsspec.core.url_to_fs(str(path))
+    info = fs.info(fs_path)
+    return {field: str(info[field]) for field in METADATA_FIELDS if field in info}
+
+
+def input_fingerprint(data_location: str | Path, extra: dict[str, Any] | None = None) -> str:
+    """Compute the fingerprint of the raw inputs and output-relevant settings.
+
+    Args:
+        data_location: Local directory or S3 prefix containing the raw input files
+        extra: Optional additional values that affect the output
+
+    Returns:
+        Hex digest identifying this combination of inputs and settings
+
+    """
+    payload = {
+        "version": PROCESSING_VERSION,
+        "inputs": {name: file_metadata(_join(data_location, filename)) for name, filename in RAW_FILES.items()},
+        "settings": settings.data_prep.model_dump(exclude=RUNTIME_SETTINGS),
+        "extra": extra or {},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def settings_fingerprint() -> str:
+    """Compute the fingerprint of the output-relevant settings alone.
+
+    Returns:
+        Hex digest identifying the processing version and settings
+
+    """
+    payload = {
+        "version": PROCESSING_VERSION,
+        "settings": settings.data_prep.model_dump(exclude=RUNTIME_SETTINGS),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _hash_by_period(df: pd.DataFrame, periods: np.ndarray) -> dict[int, str]:
+    """Hash the rows of each month period, in row order."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    order = np.argsort(periods, kind="stable")
+    unique, starts = np.unique(periods[order], return_index=True)
+    return {
+        period: hashlib.sha256(row_hashes[rows].tobytes()).hexdigest()
+        for period, rows in zip(unique.tolist(), np.split(order, starts[1:]), strict=True)
+    }
+
+
+def period_fingerprints(
+    hospital_df: pd.DataFrame,
+    supplementary: Mapping[str, pd.DataFrame],
+    month_window: int = 0,
+) -> dict[str, str]:
+    """Hash the inputs that determine the processed rows of each month.
+
+    The processed rows of a month depend on the hospital rows of that month and
+    on the supplementary rows of every month within ``month_window`` of it, so a
+    change to a supplementary month also changes the hashes of its neighbours.
+
+    Args:
+        hospital_df: Hospital DataFrame with ``Year`` and ``Month``
+        supplementary: Raw supplementary DataFrames keyed by column prefix (e.g. 'toilet')
+        month_window: Months the join falls back in either direction
+
+    Returns:
+        Mapping of month period (as a string, for JSON) to hex digest, for every
+        month holding hospital rows
+
+    """
+    hospital = _hash_by_period(hospital_df, year_month_to_period(hospital_df["Year"], hospital_df["Month"]))
+    sources = {
+        prefix: _hash_by_period(df, month_year_to_period(df[f"{prefix}_Month_Year"]))
+        for prefix, df in sorted(supplementary.items())
+    }
+    fingerprints = {}
+    for period, digest in hospital.items():
+        h = hashlib.sha256(digest.encode())
+        for prefix, hashes in sources.items():
+            for neighbour in range(period - month_window, period + month_window + 1):
+                h.update(f"{prefix}:{neighbour}:{hashes.get(neighbour, '')};".encode())
+        fingerprints[str(period)] = h.hexdigest()
+    return fingerprints
+
+
+def changed_periods(
+    manifest: dict[str, Any] | None,
+    fmt: str,
+    periods: dict[str, str],
+) -> tuple[list[int], list[int]] | None:
+    """Compare the current month fingerprints with those of the last processed dataset.
+
+    Args:
+        manifest: Manifest of the existing processed dataset, if any
+        fmt: Storage format the dataset is written in
+        periods: Fingerprints returned by ``period_fingerprints``
+
+    Returns:
+        Tuple of (new or changed periods, periods no longer present), or None when
+        the dataset has to be rebuilt in full because there is no comparable
+        manifest, the settings changed, the format is not partitioned or a month
+        cannot be mapped to a partition
+
+    """
+    if fmt != "parquet" or manifest is None or manifest.get("format") != fmt:
+        return None
+    if manifest.get("settings") != settings_fingerprint() or "periods" not in manifest:
+        return None
+
+    previous = manifest["periods"]
+    changed = sorted(int(period) for period, digest in periods.items() if previous.get(period) != digest)
+    removed = sorted(int(period) for period in previous if period not in periods)
+    if any(period < 0 for period in changed + removed):
+        return None
+    return changed, removed
+
+
+def read_manifest(output_location: str | Path) -> dict[str, Any] | None:
+    """Read the manifest of a processed dataset.
+
+    Args:
+        output_location: Local directory or S3 prefix holding the processed dataset
+
+    Returns:
+        Manifest contents, or None if there is no readable manifest
+
+    """
+    path = _join(output_location, MANIFEST_NAME)
+    try:
+        with fsspec.open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(
+    output_location: str | Path,
+    fingerprint: str,
+    fmt: str,
+    *,
+    rows: int | None = None,
+    settings: str | None = None,
+    periods: dict[str, str] | None = None,
+) -> None:
+    """Record the fingerprint of a freshly written processed dataset.
+
+    Args:
+        output_location: Local directory or S3 prefix holding the processed dataset
+        fingerprint: Fingerprint returned by ``input_fingerprint``
+        fmt: Storage format the dataset was written in
+        rows: Optional number of hospital rows in the dataset
+        settings: Optional ``settings_fingerprint`` the dataset was computed with
+        periods: Optional ``period_fingerprints`` of the dataset's inputs
+
+    """
+    manifest = {
+        "fingerprint": fingerprint,
+        "format": fmt,
+        "created": datetime.now(timezone.utc).isoformat(),
+    }
+    extra = {"rows": rows, "settings": settings, "periods": periods}
+    manifest.update({key: value for key, value in extra.items() if value is not None})
+    with fsspec.open(_join(output_location, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def clear_manifest(output_location: str | Path) -> None:
+    """Remove the manifest so a partially rewritten dataset is never treated as cached.
+
+    Args:
+        output_location: Local directory or S3 prefix holding the processed dataset
+
+    """
+    path = _join(output_location, MANIFEST_NAME)
+    fs, fs_path = fsspec.core.url_to_fs(path)
+    if fs.exists(fs_path):
+        fs.rm(fs_path)
+
+
+def is_cached(output_location: str | Path, fingerprint: str, fmt: str) -> bool:
+    """Check whether a processed dataset matching the fingerprint already exists.
+
+    Args:
+        output_location: Local directory or S3 prefix holding the processed dataset
+        fingerprint: Fingerprint of the current inputs and settings
+        fmt: Storage format the dataset is expected in
+
+    Returns:
+        True when the manifest matches and the dataset files are present
+
+    """
+    manifest = read_manifest(output_location)
+    if manifest is None or manifest.get("fingerprint") != fingerprint or manifest.get("format") != fmt:
+        return False
+
+    fs, _ = fsspec.core.url_to_fs(str(output_location))
+    if fmt == "csv":
+        paths = [_join(output_location, f"{split}.csv") for split in CSV_SPLITS]
+    else:
+        paths = [_join(output_location, PROCESSED_DATASET)]
+    return all(fs.exists(fsspec.core.url_to_fs(path)[1]) for path in paths)
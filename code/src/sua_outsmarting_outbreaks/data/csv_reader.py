@@ -0,0 +1,167 @@
+"""CSV parsing with a selectable engine.
+
+The 'pandas' engine is the default single-threaded pandas C parser. The
+'pyarrow' engine parses with ``pyarrow.csv`` on all cores, reads categorical
+columns straight into dictionary arrays and hands the table to pandas with
+``self_destruct`` so column buffers are released as they are converted.
+String columns are mapped to the Arrow-backed string dtype, so they are not
+copied at all. That dtype is pandas 3's default ``str``, so on pandas 3 both
+engines return identical frames. On pandas 2 the 'pandas' engine still
+returns ``object`` strings, and the engines agree on the values and on the
+dtypes of the declared columns.
+"""
+
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import fsspec
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+
+from sua_outsmarting_outbreaks.utils.constants import CSV_ENGINE
+
+CSV_ENGINES = ("pandas", "pyarrow")
+
+# Arrow types of the declared pandas dtypes
+_ARROW_TYPES = {
+    "category": pa.dictionary(pa.int32(), pa.string()),
+    "float32": pa.float32(),
+    "float64": pa.float64(),
+    "int8": pa.int8(),
+    "int16": pa.int16(),
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "str": pa.string(),
+}
+
+# Bytes parsed per block by the streaming reader
+_BLOCK_SIZE = 16 << 20
+
+UseCols = list[str] | Callable[[str], bool] | None
+
+
+def _arrow_string_dtype() -> pd.StringDtype:
+    """Get the Arrow-backed string dtype with NaN missing values (pandas 3's default ``str``)."""
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        # Before pandas 2.3 the NaN variant is selected through its storage name
+        return pd.StringDtype("pyarrow_numpy")
+
+
+# pandas dtypes of the Arrow string types, so string columns keep their Arrow buffers
+_STRING_DTYPES = dict.fromkeys((pa.string(), pa.large_string()), _arrow_string_dtype())
+
+
+def _check_engine(engine: str) -> None:
+    """Raise a ValueError for unsupported CSV engines."""
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unsupported CSV engine '{engine}', expected one of {CSV_ENGINES}")
+
+
+def _convert_options(path: str | Path, dtype: dict[str, str], usecols: UseCols) -> csv.ConvertOptions:
+    """Build the Arrow conversion options for the declared dtypes and selected columns."""
+    include = None
+    if callable(usecols):
+        # Arrow needs the column names up front, so read them from the header
+        with fsspec.open(str(path), "rb") as f:
+            names = csv.open_csv(f, read_options=csv.ReadOptions(block_size=1 << 16)).schema.names
+        include = [name for name in names if usecols(name)]
+    elif usecols is not None:
+        include = list(usecols)
+    return csv.ConvertOptions(
+        column_types={col: _ARROW_TYPES[dtype] for col, dtype in dtype.items()},
+        include_columns=include,
+        # Empty fields are missing values, as for the pandas parser
+        strings_can_be_null=True,
+    )
+
+
+def _to_pandas(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow table, releasing its buffers, with categories observed and sorted like the pandas parser."""
+    df = table.to_pandas(split_blocks=True, self_destruct=True, types_mapper=_STRING_DTYPES.get)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            values = df[col].cat.remove_unused_categories()
+            df[col] = values.cat.reorder_categories(values.cat.categories.sort_values())
+    return df
+
+
+def read_csv(
+    path: str | Path,
+    dtype: dict[str, str] | None = None,
+    usecols: UseCols = None,
+    engine: str = CSV_ENGINE,
+) -> pd.DataFrame:
+    """Read a CSV file.
+
+    Args:
+        path: Local path or S3 URI of the CSV file
+        dtype: Dtypes of the declared columns; other columns are inferred
+        usecols: Optional list of columns, or a callable selecting columns by name
+        engine: CSV engine, one of ``CSV_ENGINES``
+
+    Returns:
+        DataFrame with the file contents
+
+    Raises:
+        ValueError: If the engine is not supported
+
+    """
+    _check_engine(engine)
+    if engine == "pandas":
+        return pd.read_csv(path, dtype=dtype, usecols=usecols)
+
+    convert_options = _convert_options(path, dtype or {}, usecols)
+    with fsspec.open(str(path), "rb") as f:
+        table = csv.read_csv(f, read_options=csv.ReadOptions(use_threads=True), convert_options=convert_options)
+    return _to_pandas(table)
+
+
+def iter_csv(
+    path: str | Path,
+    chunk_rows: int,
+    dtype: dict[str, str] | None = None,
+    engine: str = CSV_ENGINE,
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV file in row chunks.
+
+    Args:
+        path: Local path or S3 URI of the CSV file
+        chunk_rows: Maximum number of rows per chunk
+        dtype: Dtypes of the declared columns; other columns are inferred
+        engine: CSV engine, one of ``CSV_ENGINES``
+
+    Yields:
+        DataFrames of at most ``chunk_rows`` rows, in file order
+
+    Raises:
+        ValueError: If the engine is not supported
+
+    """
+    _check_engine(engine)
+    if engine == "pandas":
+        with pd.read_csv(path, dtype=dtype, chunksize=chunk_rows) as reader:
+            yield from reader
+        return
+
+    convert_options = _convert_options(path, dtype or {}, None)
+    with fsspec.open(str(path), "rb") as f:
+        reader = csv.open_csv(
+            f, read_options=csv.ReadOptions(use_threads=True, block_size=_BLOCK_SIZE), convert_options=convert_options
+        )
+        # Parsed blocks do not line up with chunks, so rows are carried over between them
+        pending: list[pa.RecordBatch] = []
+        pending_rows = 0
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            while pending_rows >= chunk_rows:
+                table = pa.Table.from_batches(pending)
+                yield _to_pandas(table.slice(0, chunk_rows))
+                pending = table.slice(chunk_rows).to_batches()
+                pending_rows -= chunk_rows
+        if pending_rows:
+            yield _to_pandas(pa.Table.from_batches(pending, schema=reader.schema))
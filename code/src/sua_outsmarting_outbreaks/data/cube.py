@@ -0,0 +1,225 @@
+"""Pre-aggregated spatio-temporal cube of the supplementary datasets.
+
+Each supplementary table is reduced to per-month grids of square cells
+holding the site count and the mean of every numeric measurement. Every month
+is stored as one ``(nx, ny, n_stats)`` ``.npy`` array covering the cells that
+month occupies, so the statistics for any location and month are read with
+plain array indexing. A manifest records a content hash per month, and
+updating the cube only rewrites the months whose rows changed.
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sua_outsmarting_outbreaks.utils.logging_utils import DataError, setup_logger
+from sua_outsmarting_outbreaks.utils.spatial import month_year_to_period, year_month_to_period
+from sua_outsmarting_outbreaks.utils.spatial_cache import array_hash
+
+logger = setup_logger(__name__)
+
+# Bump when the on-disk layout or the aggregation changes
+CUBE_VERSION = 1
+
+CUBE_MANIFEST = "cube.json"
+
+# Largest number of cells a single month may span before the cell size is considered too fine
+MAX_MONTH_CELLS = 50_000_000
+
+
+def cube_value_columns(df: pd.DataFrame, prefix: str) -> list[str]:
+    """Return the numeric measurement columns aggregated into the cube.
+
+    Args:
+        df: Supplementary DataFrame
+        prefix: Column prefix of the dataset (e.g. 'toilet')
+
+    Returns:
+        Numeric columns other than the coordinates
+
+    """
+    coordinates = {f"{prefix}_Transformed_Latitude", f"{prefix}_Transformed_Longitude"}
+    return [col for col in df.columns if col not in coordinates and pd.api.types.is_numeric_dtype(df[col])]
+
+
+def _aggregate_month(points: np.ndarray, values: np.ndarray, cell_size: float) -> tuple[list[int], np.ndarray]:
+    """Aggregate one month of sites into a dense grid of cell statistics.
+
+    Args:
+        points: Array of shape (m, 2) with finite site coordinates
+        values: Array of shape (m, c) with the site measurements
+        cell_size: Edge length of the grid cells
+
+    Returns:
+        Tuple of (origin cell, array of shape (nx, ny, 1 + c)) holding the site count
+        followed by the mean of each measurement (NaN where a cell has no value)
+
+    Raises:
+        DataError: If the month spans more than ``MAX_MONTH_CELLS`` cells
+
+    """
+    cells = np.floor(points / cell_size).astype(np.int64)
+    origin = cells.min(axis=0)
+    shape = cells.max(axis=0) - origin + 1
+    if shape.prod() > MAX_MONTH_CELLS:
+        raise DataError(f"Cube cell size {cell_size} is too fine: one month spans {shape.prod()} cells")
+
+    flat = (cells[:, 0] - origin[0]) * shape[1] + (cells[:, 1] - origin[1])
+    n_cells = int(shape.prod())
+    stats = np.empty((n_cells, 1 + values.shape[1]), dtype=np.float32)
+    stats[:, 0] = np.bincount(flat, minlength=n_cells)
+    present = ~np.isnan(values)
+    for col in range(values.shape[1]):
+        totals = np.bincount(flat, weights=np.where(present[:, col], values[:, col], 0.0), minlength=n_cells)
+        counts = np.bincount(flat, weights=present[:, col], minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats[:, 1 + col] = totals / counts
+    return origin.tolist(), stats.reshape(shape[0], shape[1], -1)
+
+
+class SupplementaryCube:
+    """Per-month cell statistics of one supplementary dataset, read from disk."""
+
+    def __init__(self, directory: Path) -> None:
+        """Open a cube written by ``update_cube``.
+
+        Args:
+            directory: Cube directory
+
+        """
+        self._directory = Path(directory)
+        manifest = json.loads((self._directory / CUBE_MANIFEST).read_text())
+        self.cell_size = manifest["cell_size"]
+        self.stat_names = manifest["stats"]
+        self._months = {int(period): month for period, month in manifest["periods"].items()}
+        self._arrays: dict[int, np.ndarray] = {}
+
+    @property
+    def periods(self) -> list[int]:
+        """Month periods held by the cube."""
+        return sorted(self._months)
+
+    def month(self, period: int) -> np.ndarray:
+        """Return the memory-mapped cell statistics of one month."""
+        if period not in self._arrays:
+            self._arrays[period] = np.load(self._directory / self._months[period]["file"], mmap_mode="r")
+        return self._arrays[period]
+
+    def lookup(self, points: np.ndarray, periods: np.ndarray) -> np.ndarray:
+        """Read the statistics of the cell containing each point, in the point's month.
+
+        Args:
+            points: Array of shape (n, 2) with query coordinates
+            periods: Array of n integer month periods
+
+        Returns:
+            Array of shape (n, n_stats). Points in a month without data are NaN; points
+            outside every occupied cell of their month get a count of 0 and NaN means.
+
+        """
+        result = np.full((len(points), len(self.stat_names)), np.nan, dtype=np.float32)
+        finite = np.isfinite(points).all(axis=1)
+        cells = np.floor(np.where(finite[:, None], points, 0) / self.cell_size).astype(np.int64)
+        for period in np.unique(periods[finite]).tolist():
+            if period not in self._months:
+                continue
+            members = np.flatnonzero(finite & (periods == period))
+            stats = self.month(period)
+            local = cells[members] - np.asarray(self._months[period]["origin"])
+            inside = ((local >= 0) & (local < stats.shape[:2])).all(axis=1)
+            result[members, 0] = 0
+            result[members[inside]] = stats[local[inside, 0], local[inside, 1]]
+        return result
+
+
+def update_cube(
+    df: pd.DataFrame,
+    prefix: str,
+    directory: Path,
+    cell_size: float,
+    *,
+    prune: bool = True,
+) -> SupplementaryCube:
+    """Build or incrementally refresh the cube of a supplementary dataset.
+
+    Months whose rows are unchanged since the last update are kept as they are,
+    new or changed months are re-aggregated and months no longer present are
+    removed. Changing the cell size or the measurement columns rebuilds the cube.
+
+    Args:
+        df: Supplementary DataFrame with ``{prefix}_Month_Year`` and coordinate columns
+        prefix: Column prefix of the dataset (e.g. 'toilet')
+        directory: Cube directory
+        cell_size: Edge length of the grid cells, in coordinate units
+        prune: Remove months absent from ``df``. Disable when ``df`` only holds some months.
+
+    Returns:
+        The updated cube
+
+    """
+    directory = Path(directory)
+    value_cols = cube_value_columns(df, prefix)
+    stats = ["count", *(f"{col}_mean" for col in value_cols)]
+    layout = {"version": CUBE_VERSION, "cell_size": cell_size, "stats": stats}
+
+    manifest_path = directory / CUBE_MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    if {key: manifest.get(key) for key in layout} != layout:
+        if manifest:
+            logger.info(f"Cube layout of {prefix} changed, rebuilding {directory}")
+        shutil.rmtree(directory, ignore_errors=True)
+        manifest = {**layout, "periods": {}}
+    directory.mkdir(parents=True, exist_ok=True)
+
+    points = df[[f"{prefix}_Transformed_Latitude", f"{prefix}_Transformed_Longitude"]].to_numpy(dtype=float)
+    values = df[value_cols].to_numpy(dtype=float)
+    periods = month_year_to_period(df[f"{prefix}_Month_Year"])
+    valid = np.flatnonzero(np.isfinite(points).all(axis=1) & (periods >= 0))
+    order = valid[np.argsort(periods[valid], kind="stable")]
+    month_periods, starts = np.unique(periods[order], return_index=True)
+    stops = np.append(starts[1:], len(order))
+
+    months = {} if prune else dict(manifest["periods"])
+    rebuilt = 0
+    for period, start, stop in zip(month_periods.tolist(), starts.tolist(), stops.tolist(), strict=True):
+        rows = order[start:stop]
+        digest = array_hash(points[rows], values[rows])
+        previous = manifest["periods"].get(str(period))
+        if previous is not None and previous["hash"] == digest:
+            months[str(period)] = previous
+            continue
+        origin, month_stats = _aggregate_month(points[rows], values[rows], cell_size)
+        filename = f"period_{period}.npy"
+        np.save(directory / filename, month_stats)
+        months[str(period)] = {"hash": digest, "origin": origin, "file": filename}
+        rebuilt += 1
+
+    for period, month in manifest["periods"].items():
+        if period not in months:
+            (directory / month["file"]).unlink(missing_ok=True)
+
+    manifest_path.write_text(json.dumps({**layout, "periods": months}, indent=2))
+    logger.info(f"Cube of {prefix}: {len(months)} months, {rebuilt} rebuilt, {len(months) - rebuilt} reused")
+    return SupplementaryCube(directory)
+
+
+def cube_features(hospital_df: pd.DataFrame, cube: SupplementaryCube, prefix: str) -> pd.DataFrame:
+    """Look up the cube statistics for every hospital row.
+
+    Args:
+        hospital_df: DataFrame with hospital coordinates and ``Year``/``Month``
+        cube: Cube of one supplementary dataset
+        prefix: Column prefix of the dataset (e.g. 'toilet')
+
+    Returns:
+        DataFrame aligned with ``hospital_df`` with one ``{prefix}_cell_{stat}`` column per statistic
+
+    """
+    points = hospital_df[["Transformed_Latitude", "Transformed_Longitude"]].to_numpy(dtype=float)
+    periods = year_month_to_period(hospital_df["Year"], hospital_df["Month"])
+    values = cube.lookup(points, periods)
+    stat_columns = [f"{prefix}_cell_{stat.removeprefix(f'{prefix}_')}" for stat in cube.stat_names]
+    return pd.DataFrame(values, index=hospital_df.index, columns=stat_columns)
@@ -1,23 +1,79 @@
 """Data preparation module for preprocessing training and test data."""
 
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
+from typing import Any
 
 import boto3
 import numpy as np
 import pandas as pd
-from scipy.spatial import cKDTree
 
+from sua_outsmarting_outbreaks.data.cache import (
+    changed_periods,
+    clear_manifest,
+    input_fingerprint,
+    is_cached,
+    period_fingerprints,
+    read_manifest,
+    settings_fingerprint,
+    write_manifest,
+)
+from sua_outsmarting_outbreaks.data.csv_reader import iter_csv, read_csv
+from sua_outsmarting_outbreaks.data.cube import SupplementaryCube, cube_features, update_cube
+from sua_outsmarting_outbreaks.data.feature_cache import (
+    feature_key,
+    hospital_fingerprint,
+    load_features,
+    save_features,
+)
+from sua_outsmarting_outbreaks.data.schema import RAW_FILES, SUPPLEMENTARY_PREFIXES, apply_raw_schema, raw_dtypes
+from sua_outsmarting_outbreaks.data.storage import remove_partitions, write_processed
 from sua_outsmarting_outbreaks.utils.aws_utils import (
     get_data_bucket_name,
     get_data_source,
+    get_instance_vcpus,
     get_user_bucket_name,
 )
-from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+from sua_outsmarting_outbreaks.utils.constants import (
+    APPROXIMATE_EPS,
+    CHUNK_ROWS,
+    COORDINATE_MODE,
+    CSV_ENGINE,
+    CUBE_CELL_SIZE,
+    DENSITY_RADII,
+    DUPLICATE_STRATEGY,
+    FEATURE_CACHE,
+    INCREMENTAL,
+    INDEX_CACHE,
+    INDEX_CACHE_DIR,
+    LOAD_WORKERS,
+    MAX_DISTANCE,
+    MONTH_WINDOW,
+    NEIGHBOURS,
+    PREP_PROCESSES,
+    QUERY_WORKERS,
+    RECALL_SAMPLE,
+    REFERENCE_SAMPLE,
+    SPATIAL_BACKEND,
+    STORAGE_FORMAT,
+)
+from sua_outsmarting_outbreaks.utils.logging_utils import DataError, setup_logger
+from sua_outsmarting_outbreaks.utils.spatial import (
+    SpatialTarget,
+    build_target_indexes,
+    idw_aggregate,
+    month_year_to_period,
+    spatial_join,
+    year_month_to_period,
+)
 
 # Configure logger
 logger = setup_logger(__name__)
 
-from sua_outsmarting_outbreaks.utils.directory_utils import get_data_dir, ensure_dir
+from sua_outsmarting_outbreaks.utils.directory_utils import ensure_dir, get_cache_dir, get_data_dir
 
 def download_from_s3(bucket: str, key: str, local_path: Path) -> None:
     """Download a file from S3."""
@@ -32,12 +88,26 @@ def upload_to_s3(local_path: Path, bucket: str, key: str) -> None:
     s3_client = boto3.client("s3")
     s3_client.upload_file(str(local_path), bucket, key)
 
-def preprocess_data(local_data_dir: str | None = None, output_dir: str | None = None) -> None:
+def preprocess_data(
+    local_data_dir: str | None = None,
+    output_dir: str | None = None,
+    *,
+    force: bool = False,
+) -> None:
     """Preprocess the data for training and testing.
 
+    The stage is skipped when the output location already holds a processed
+    dataset whose manifest matches the fingerprint of the current inputs and
+    settings, unless ``force`` is set. Otherwise, when ``incremental`` is set and
+    the settings are unchanged, only the ``Year=…/Month=…`` partitions whose
+    hospital or supplementary rows changed are recomputed and rewritten. With
+    ``chunk_rows`` set, the hospital rows are instead streamed to Parquet in
+    chunks (see ``stream_process_data``).
+
     Args:
         local_data_dir: Optional local directory containing input data files
         output_dir: Optional local directory for output files
+        force: Recompute everything even when a matching processed dataset exists
 
     """
     data_path, is_local = get_data_source(local_data_dir)
@@ -49,89 +119,202 @@ def preprocess_data(local_data_dir: str | None = None, output_dir: str | None =
     logger.info(f"Using input bucket: {data_bucket_name}")
     logger.info(f"Using team bucket: {user_bucket_name}")
 
+    # Reuse an existing processed dataset when inputs and settings are unchanged
+    output_location = str(Path(output_dir).resolve()) if output_dir else f"s3://{user_bucket_name}"
+    fingerprint, cached = check_output_cache(data_path, output_location, force=force)
+    if cached:
+        return
+
+    # Stream the hospital rows when they may not fit in memory
+    if CHUNK_ROWS:
+        write_chunked_output(data_path, output_location, fingerprint)
+        return
+
     # Load datasets from either local or S3
     if is_local:
-        data_path = Path(data_path).resolve()
-        logger.info(f"Loading data from local directory: {data_path}")
-        logger.debug(f"Directory contents: {list(data_path.glob('*.csv'))}")
-
-        try:
-            train_path = data_path / "Train.csv"
-            test_path = data_path / "Test.csv"
-            toilets_path = data_path / "toilets.csv"
-            waste_path = data_path / "waste_management.csv"
-            water_path = data_path / "water_sources.csv"
-
-            # Check if files exist
-            for p in [train_path, test_path, toilets_path, waste_path, water_path]:
-                if not p.exists():
-                    raise FileNotFoundError(f"Required file not found: {p}")
-
-            logger.debug(f"Attempting to read files from: {data_path}")
-            logger.debug(f"Directory contents: {list(data_path.glob('*.csv'))}")
-
-            train = pd.read_csv(train_path)
-            logger.debug(f"Train path: {train_path}")
-            logger.debug(f"Train columns: {train.columns.tolist()}")
-            logger.debug(f"Train head:\n{train.head()}")
-
-            test = pd.read_csv(test_path)
-            logger.debug(f"Test path: {test_path}")
-            logger.debug(f"Test columns: {test.columns.tolist()}")
-            logger.debug(f"Test head:\n{test.head()}")
-
-            toilets = pd.read_csv(toilets_path)
-            logger.debug(f"Toilets path: {toilets_path}")
-            logger.debug(f"Toilets columns: {toilets.columns.tolist()}")
-            logger.debug(f"Toilets head:\n{toilets.head()}")
-
-            waste_management = pd.read_csv(waste_path)
-            logger.debug(f"Waste management path: {waste_path}")
-            logger.debug(f"Waste management columns: {waste_management.columns.tolist()}")
-            logger.debug(f"Waste management head:\n{waste_management.head()}")
-
-            water_sources = pd.read_csv(water_path)
-            logger.debug(f"Water sources path: {water_path}")
-            logger.debug(f"Water sources columns: {water_sources.columns.tolist()}")
-            logger.debug(f"Water sources head:\n{water_sources.head()}")
-
-            logger.info(f"Loaded training data shape: {train.shape}")
-            logger.info(f"Loaded test data shape: {test.shape}")
-            logger.debug(f"Train contents: {train}")
-            # Fill missing values in target column
-            train["Total"] = train["Total"].fillna(0)
-            test["Total"] = test["Total"].fillna(0)
-
-        except FileNotFoundError as e:
-            logger.error(f"Could not find required data file: {e}")
-            raise
-        except pd.errors.EmptyDataError:
-            logger.error("One or more data files are empty")
-            raise
-        except Exception as e:
-            logger.error(f"Error loading data: {e}")
-            raise
+        train, test, toilets, waste_management, water_sources = load_local_datasets(Path(data_path).resolve())
     else:
         # Load from S3 data bucket
         train, test, toilets, waste_management, water_sources = load_datasets(data_bucket_name)
 
-    # Combine train and test datasets
-    hospital_data = pd.concat([train, test])
+    # Combine train and test datasets (categories differ between the files, so re-apply the schema)
+    hospital_data = apply_raw_schema(pd.concat([train, test]), "train")
+    supplementary = {"toilet": toilets, "waste": waste_management, "water": water_sources}
+
+    # Only recompute the months whose inputs changed since the last processed dataset
+    periods = period_fingerprints(hospital_data, supplementary, MONTH_WINDOW)
+    delta = None
+    if INCREMENTAL and not force and REFERENCE_SAMPLE >= 1:
+        delta = changed_periods(read_manifest(output_location), STORAGE_FORMAT, periods)
+
+    clear_manifest(output_location)
+    if delta is None:
+        merged_data = process_data(hospital_data, toilets, waste_management, water_sources)
+        save_output(merged_data, output_dir, user_bucket_name)
+    else:
+        changed, removed = delta
+        logger.info(f"Incremental update: {len(changed)} of {len(periods)} months changed, {len(removed)} removed")
+        update_changed_periods(
+            hospital_data,
+            supplementary,
+            changed,
+            removed,
+            output_dir=output_dir,
+            user_bucket=user_bucket_name,
+        )
+
+    if fingerprint is not None:
+        write_manifest(
+            output_location,
+            fingerprint,
+            STORAGE_FORMAT,
+            rows=len(hospital_data),
+            settings=settings_fingerprint(),
+            periods=periods,
+        )
+
+
+def check_output_cache(data_path: str | Path, output_location: str, *, force: bool = False) -> tuple[str | None, bool]:
+    """Fingerprint the inputs and check whether the processed dataset is already up to date.
+
+    Args:
+        data_path: Local directory or S3 prefix containing the raw input files
+        output_location: Local directory or S3 prefix holding the processed dataset
+        force: Treat the dataset as out of date
+
+    Returns:
+        Tuple of (input fingerprint, or None when an input is missing, whether the dataset can be reused)
+
+    """
+    try:
+        fingerprint = input_fingerprint(data_path)
+    except FileNotFoundError:
+        # Missing inputs are reported by the loaders
+        return None, False
+    if not force and is_cached(output_location, fingerprint, STORAGE_FORMAT):
+        logger.info(f"Cache hit: {output_location} is up to date (fingerprint {fingerprint[:12]}), skipping")
+        return fingerprint, True
+    logger.info(f"Cache {'bypassed (--force)' if force else 'miss'}: preparing data for {output_location}")
+    return fingerprint, False
+
+
+def write_chunked_output(data_path: str | Path, output_location: str, fingerprint: str | None) -> None:
+    """Stream the hospital rows to the output location and record the manifest.
 
-    # Process the data
-    merged_data = process_data(hospital_data, toilets, waste_management, water_sources)
+    Args:
+        data_path: Local directory or S3 prefix containing the raw input files
+        output_location: Local directory or S3 prefix for the processed dataset
+        fingerprint: Input fingerprint to record, or None to leave the dataset without a manifest
+
+    """
+    rows = stream_process_data(data_path, output_location, CHUNK_ROWS)
+    if fingerprint is not None:
+        write_manifest(output_location, fingerprint, STORAGE_FORMAT, rows=rows)
+
+
+def update_changed_periods(
+    hospital_data: pd.DataFrame,
+    supplementary: dict[str, pd.DataFrame],
+    changed: list[int],
+    removed: list[int],
+    *,
+    output_dir: str | None,
+    user_bucket: str,
+) -> None:
+    """Rewrite only the partitions of the months whose inputs changed.
 
-    # Save results to user bucket or local dir
+    Args:
+        hospital_data: All hospital rows
+        supplementary: Raw supplementary datasets keyed by column prefix
+        changed: Month periods (``Year * 12 + Month - 1``) to recompute
+        removed: Month periods whose partitions no longer have hospital rows
+        output_dir: Optional local directory for output files
+        user_bucket: S3 bucket to write to when ``output_dir`` is not set
+
+    """
+    output_location = str(Path(output_dir).resolve()) if output_dir else f"s3://{user_bucket}"
+    remove_partitions(output_location, [(period // 12, period % 12 + 1) for period in removed])
+    if not changed:
+        return
+    hospital_periods = year_month_to_period(hospital_data["Year"], hospital_data["Month"])
+    # Each month is enriched with supplementary rows from the surrounding window
+    needed = [n for period in changed for n in range(period - MONTH_WINDOW, period + MONTH_WINDOW + 1)]
+    toilets, waste_management, water_sources = (
+        df[np.isin(month_year_to_period(df[f"{prefix}_Month_Year"]), needed)] for prefix, df in supplementary.items()
+    )
+    merged_data = process_data(
+        hospital_data[np.isin(hospital_periods, changed)],
+        toilets,
+        waste_management,
+        water_sources,
+        partial=True,
+    )
+    save_output(merged_data, output_dir, user_bucket, replace=False)
+
+
+def stream_process_data(data_location: str | Path, output_location: str | Path, chunk_rows: int) -> int:
+    """Process the hospital rows in chunks and append each enriched chunk to the Parquet dataset.
+
+    The supplementary tables are loaded and their indexes and cubes prepared
+    once. The hospital files are then read ``chunk_rows`` rows at a time and
+    every chunk is joined and written before the next one is read, so peak
+    memory depends on the chunk size and the supplementary data rather than on
+    the number of hospital rows. The output has the same rows, in the same
+    order, as the in-memory path.
+
+    Args:
+        data_location: Local directory or S3 prefix containing the raw input files
+        output_location: Local directory or S3 prefix for the processed dataset
+        chunk_rows: Maximum number of hospital rows held in memory at a time
+
+    Returns:
+        Number of hospital rows written
+
+    Raises:
+        ValueError: If the storage format is not Parquet
+
+    """
+    if STORAGE_FORMAT != "parquet":
+        raise ValueError(f"Chunked processing writes Parquet, but storage_format is '{STORAGE_FORMAT}'")
+
+    base = str(data_location).rstrip("/")
+    supplementary = [read_input(f"{base}/{RAW_FILES[name]}", name) for name in SUPPLEMENTARY_PREFIXES]
+    targets = prepare_targets(*supplementary)
+    del supplementary
+    cubes = update_cubes(targets)
+
+    clear_manifest(output_location)
+    chunks = chain.from_iterable(
+        read_input_chunks(f"{base}/{RAW_FILES[name]}", name, chunk_rows) for name in ("train", "test")
+    )
+    rows = 0
+    for position, chunk in enumerate(chunks):
+        chunk["Total"] = chunk["Total"].fillna(0)
+        # Train and test categories differ, so every chunk gets the shared hospital schema
+        merged_data = enrich_hospital_rows(apply_raw_schema(chunk, "train"), targets, cubes)
+        write_processed(merged_data, output_location, replace=position == 0, chunk=position)
+        rows += len(merged_data)
+    logger.info(f"Streamed {rows} hospital rows in chunks of {chunk_rows}")
+    return rows
+
+
+def save_output(merged_data: pd.DataFrame, output_dir: str | None, user_bucket: str, *, replace: bool = True) -> None:
+    """Save the processed dataset to the local output directory or the user bucket.
+
+    Args:
+        merged_data: DataFrame containing processed data
+        output_dir: Optional local directory for output files
+        user_bucket: S3 bucket used when no output directory is given
+        replace: Replace the whole dataset; when False only the partitions in ``merged_data`` are rewritten
+
+    """
     if output_dir:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         logger.info(f"Saving processed data to {output_path}")
-        processed_train = merged_data[merged_data["Year"] < TRAIN_CUTOFF_YEAR]
-        processed_test = merged_data[merged_data["Year"] == TRAIN_CUTOFF_YEAR]
-        processed_train.to_csv(output_path / "processed_train.csv", index=False)
-        processed_test.to_csv(output_path / "processed_test.csv", index=False)
+        write_processed(merged_data, output_path, replace=replace)
     else:
-        save_processed_data(merged_data, user_bucket_name)
+        save_processed_data(merged_data, user_bucket, replace=replace)
 
 
 # Configure instance type based on data size
@@ -141,14 +324,45 @@ def preprocess_data(local_data_dir: str | None = None, output_dir: str | None =
 # - 2300 MBps EBS bandwidth
 
 
-# Helper function to find nearest locations
+# Helper functions to find nearest locations
+def get_index_cache_dir() -> Path | None:
+    """Get the configured spatial index cache directory.
+
+    Returns:
+        Cache directory, or None when the index cache is disabled
+
+    """
+    if not INDEX_CACHE:
+        return None
+    return ensure_dir(INDEX_CACHE_DIR) if INDEX_CACHE_DIR else ensure_dir(get_cache_dir() / "spatial_index")
+
+
+def get_feature_cache_dir() -> Path | None:
+    """Get the directory of the per-source join column cache.
+
+    The cache is disabled when ``feature_cache`` is off and for subsampled joins,
+    whose sample depends on which sources are joined together.
+
+    Returns:
+        Cache directory, or None when the feature cache is not used
+
+    """
+    if not FEATURE_CACHE or REFERENCE_SAMPLE < 1:
+        return None
+    return ensure_dir(get_cache_dir() / "features")
+
+
 def find_nearest(
     hospital_df: pd.DataFrame,
     location_df: pd.DataFrame,
     lat_col: str,
     lon_col: str,
     id_col: str,
-) -> dict[str, str]:
+    *,
+    month_year_col: str | None = None,
+    month_window: int = MONTH_WINDOW,
+    workers: int = QUERY_WORKERS,
+) -> pd.Series:
     """Find nearest locations using KD-tree spatial indexing.
 
     Args:
@@ -157,17 +371,156 @@ def find_nearest(
         lat_col: Name of latitude column
         lon_col: Name of longitude column
         id_col: Name of ID column
+        month_year_col: Optional name of the ``{month}_{year}`` column in ``location_df``
+        month_window: Months to fall back in either direction for temporal matching
+        workers: Number of worker threads for the KD-tree query
+
+    Returns:
+        Series aligned with ``hospital_df`` holding the nearest location ID for each row
+        (NaN where no location could be matched)
+
+    """
+    target = SpatialTarget("location", location_df, lat_col, lon_col, id_col=id_col, month_year_col=month_year_col)
+    matches = spatial_join(
+        hospital_df,
+        [target],
+        month_window=month_window,
+        max_distance=MAX_DISTANCE,
+        coordinate_mode=COORDINATE_MODE,
+        backend=SPATIAL_BACKEND,
+        workers=workers,
+    )
+    return matches["location_nearest_id"].rename(id_col)
+
+
+def _parse_dtypes(name: str) -> dict[str, str]:
+    """Dtypes passed to the CSV parser; integer columns are cast afterwards so missing values do not fail the read."""
+    return {col: dtype for col, dtype in raw_dtypes(name).items() if not dtype.startswith("int")}
+
+
+def read_input(
+    path: str | Path,
+    name: str,
+    usecols: list[str] | None = None,
+    engine: str = CSV_ENGINE,
+) -> pd.DataFrame:
+    """Read a raw input CSV with its declared dtype schema.
+
+    Args:
+        path: Local path or S3 URI of the CSV file
+        name: Dataset name, one of ``RAW_FILES`` (e.g. 'train', 'toilets')
+        usecols: Optional columns to read; names missing from the file are ignored
+        engine: CSV engine, one of ``CSV_ENGINES``
+
+    Returns:
+        DataFrame with categorical labels, float32 coordinates and measurements
+        and small integer Year/Month columns
+
+    """
+    dtypes = _parse_dtypes(name)
+    columns = set(usecols) if usecols is not None else None
+    selected = (lambda col: col in columns) if columns is not None else None
+    df = read_csv(path, dtype=dtypes, usecols=selected, engine=engine)
+    df = apply_raw_schema(df, name)
+    logger.debug(f"Read {name} {df.shape} using {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    return df
+
+
+def read_input_chunks(
+    path: str | Path,
+    name: str,
+    chunk_rows: int,
+    engine: str = CSV_ENGINE,
+) -> Iterator[pd.DataFrame]:
+    """Read a raw input CSV in row chunks with its declared dtype schema.
+
+    Args:
+        path: Local path or S3 URI of the CSV file
+        name: Dataset name, one of ``RAW_FILES`` (e.g. 'train', 'toilets')
+        chunk_rows: Maximum number of rows per chunk
+        engine: CSV engine, one of ``CSV_ENGINES``
+
+    Yields:
+        DataFrames of at most ``chunk_rows`` rows, as returned by ``read_input``
+
+    """
+    for chunk in iter_csv(path, chunk_rows, dtype=_parse_dtypes(name), engine=engine):
+        yield apply_raw_schema(chunk, name)
+
+
+def read_inputs(base: str | Path, max_workers: int = LOAD_WORKERS) -> dict[str, pd.DataFrame]:
+    """Read all raw input files concurrently with a bounded thread pool.
+
+    Reading is dominated by I/O (S3 latency in particular), so the files are
+    fetched and parsed in parallel. Every failure is logged with its file before
+    the first error is re-raised.
+
+    Args:
+        base: Local directory or S3 prefix (e.g. 's3://bucket') containing the input files
+        max_workers: Maximum number of files read at the same time
 
     Returns:
-        Dictionary mapping hospital IDs to nearest location IDs
+        Mapping of dataset name to DataFrame, in ``RAW_FILES`` order
+
     """
-    location_df = location_df[np.isfinite(location_df[[lat_col, lon_col]]).all(axis=1)]
-    tree = cKDTree(location_df[[lat_col, lon_col]].values)
-    nearest = {}
-    for _, row in hospital_df.iterrows():
-        _, idx = tree.query([row["Transformed_Latitude"], row["Transformed_Longitude"]])
-        nearest[row["ID"]] = location_df.iloc[idx][id_col]
-    return nearest
+    paths = {name: f"{str(base).rstrip('/')}/{filename}" for name, filename in RAW_FILES.items()}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="read-input") as executor:
+        futures = {name: executor.submit(read_input, path, name) for name, path in paths.items()}
+
+    errors = {name: future.exception() for name, future in futures.items() if future.exception() is not None}
+    for name, error in errors.items():
+        logger.error(f"Failed to read {name} from {paths[name]}: {error}")
+    if errors:
+        raise next(iter(errors.values()))
+    return {name: future.result() for name, future in futures.items()}
+
+
+def load_local_datasets(
+    data_path: Path,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Load all datasets from a local directory.
+
+    Args:
+        data_path: Local directory containing the raw input files
+
+    Returns:
+        Tuple of (train, test, toilets, waste_management, water_sources) DataFrames
+
+    """
+    logger.info(f"Loading data from local directory: {data_path}")
+    logger.debug(f"Directory contents: {list(data_path.glob('*.csv'))}")
+
+    try:
+        # Check if files exist
+        for filename in RAW_FILES.values():
+            if not (data_path / filename).exists():
+                raise FileNotFoundError(f"Required file not found: {data_path / filename}")
+
+        logger.debug(f"Attempting to read files from: {data_path}")
+        datasets = read_inputs(data_path)
+        for name, df in datasets.items():
+            logger.debug(f"{name} path: {data_path / RAW_FILES[name]}")
+            logger.debug(f"{name} columns: {df.columns.tolist()}")
+            logger.debug(f"{name} head:\n{df.head()}")
+        train, test, toilets, waste_management, water_sources = datasets.values()
+
+        logger.info(f"Loaded training data shape: {train.shape}")
+        logger.info(f"Loaded test data shape: {test.shape}")
+        logger.debug(f"Train contents: {train}")
+        # Fill missing values in target column
+        train["Total"] = train["Total"].fillna(0)
+        test["Total"] = test["Total"].fillna(0)
+
+    except FileNotFoundError as e:
+        logger.error(f"Could not find required data file: {e}")
+        raise
+    except pd.errors.EmptyDataError:
+        logger.error("One or more data files are empty")
+        raise
+    except Exception as e:
+        logger.error(f"Error loading data: {e}")
+        raise
+    return train, test, toilets, waste_management, water_sources
 
 
 def load_datasets(data_bucket: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
@@ -182,12 +535,8 @@ def load_datasets(data_bucket: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.Data
     """
     logger.info("Downloading datasets from S3...")
     try:
-        train = pd.read_csv(f"s3://{data_bucket}/Train.csv")
-        test = pd.read_csv(f"s3://{data_bucket}/Test.csv")
-        toilets = pd.read_csv(f"s3://{data_bucket}/toilets.csv")
-        waste_management = pd.read_csv(f"s3://{data_bucket}/waste_management.csv")
-        water_sources = pd.read_csv(f"s3://{data_bucket}/water_sources.csv")
-        return train, test, toilets, waste_management, water_sources
+        datasets = read_inputs(f"s3://{data_bucket}")
+        return tuple(datasets[name] for name in RAW_FILES)
     except FileNotFoundError as e:
         logger.error(f"Error: Required input file not found: {e!s}")
         logger.error(f"Please ensure all required files exist in s3://{data_bucket}/")
@@ -201,112 +550,422 @@ def load_datasets(data_bucket: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.Data
 
 
 # Preprocess water sources
-def preprocess_water_sources(water_sources: pd.DataFrame) -> pd.DataFrame:
-    """Preprocess water sources data by handling missing values and creating composite keys.
+def preprocess_water_sources(water_sources: pd.DataFrame, *, include_key: bool = False) -> pd.DataFrame:
+    """Preprocess water sources data by handling missing values and optionally creating composite keys.
 
     Args:
         water_sources: DataFrame containing water source information
+        include_key: Whether to materialize the ``water_Month_Year_lat_lon`` string key
 
     Returns:
         DataFrame with preprocessed water source data
 
     """
     water_sources.dropna(subset=["water_Transformed_Latitude"], inplace=True)
-    water_sources["water_Month_Year_lat_lon"] = (
-        water_sources["water_Month_Year"]
-        + "_"
-        + water_sources["water_Transformed_Latitude"].astype(str)
-        + "_"
-        + water_sources["water_Transformed_Longitude"].astype(str)
-    )
+    if include_key:
+        water_sources = preprocess_supplementary_data(water_sources, "water", include_key=True)
     return water_sources
 
 
-def preprocess_supplementary_data(df: pd.DataFrame, prefix: str) -> pd.DataFrame:
-    """Preprocess supplementary datasets by creating composite location-time keys.
+def preprocess_supplementary_data(df: pd.DataFrame, prefix: str, *, include_key: bool = False) -> pd.DataFrame:
+    """Preprocess supplementary datasets, optionally creating composite location-time keys.
+
+    The joins in ``process_data`` use integer row ids, so the string key is only
+    built when explicitly requested.
 
     Args:
         df: DataFrame containing supplementary data
         prefix: String prefix for column names (e.g. 'toilet', 'waste')
+        include_key: Whether to materialize the ``{prefix}_Month_Year_lat_lon`` string key
 
     Returns:
-        DataFrame with added composite key column
+        DataFrame, with the composite key column added when requested
 
     """
-    df[f"{prefix}_Month_Year_lat_lon"] = (
-        df[f"{prefix}_Month_Year"]
-        + "_"
-        + df[f"{prefix}_Transformed_Latitude"].astype(str)
-        + "_"
-        + df[f"{prefix}_Transformed_Longitude"].astype(str)
-    )
+    if include_key:
+        df[f"{prefix}_Month_Year_lat_lon"] = (
+            df[f"{prefix}_Month_Year"].astype(str)
+            + "_"
+            + df[f"{prefix}_Transformed_Latitude"].astype(str)
+            + "_"
+            + df[f"{prefix}_Transformed_Longitude"].astype(str)
+        )
     return df
 
 
-def process_data(hospital_data: pd.DataFrame, toilets_df: pd.DataFrame, waste_df: pd.DataFrame, water_df: pd.DataFrame) -> pd.DataFrame:
-    """Process and merge all datasets.
+def deduplicate_supplementary(df: pd.DataFrame, prefix: str, strategy: str = DUPLICATE_STRATEGY) -> pd.DataFrame:
+    """Collapse supplementary rows that share a Month_Year and location.
+
+    Duplicate keys used to multiply hospital rows in the join. Collapsing them
+    first guarantees at most one supplementary row per key.
+
+    Args:
+        df: DataFrame containing supplementary data
+        prefix: String prefix for column names (e.g. 'toilet', 'waste')
+        strategy: 'mean' to average numeric columns (other columns keep their first value)
+            or 'first' to keep the first row of each key
+
+    Returns:
+        DataFrame with one row per ``{prefix}_Month_Year`` and coordinate pair
+
+    Raises:
+        ValueError: If the strategy is not recognised
+
+    """
+    if strategy not in ("mean", "first"):
+        raise ValueError(f"Unknown duplicate strategy: {strategy}")
+
+    key = [f"{prefix}_Month_Year", f"{prefix}_Transformed_Latitude", f"{prefix}_Transformed_Longitude"]
+    duplicated = df.duplicated(subset=key)
+    n_duplicates = int(duplicated.sum())
+    if not n_duplicates:
+        return df
+
+    logger.warning(f"Collapsing {n_duplicates} duplicate {prefix} rows using '{strategy}'")
+    if strategy == "first":
+        return df[~duplicated]
+
+    grouped = df.groupby(key, sort=False, dropna=False, observed=True)
+    value_cols = [col for col in df.columns if col not in key]
+    numeric_cols = [col for col in value_cols if pd.api.types.is_numeric_dtype(df[col])]
+    other_cols = [col for col in value_cols if col not in numeric_cols]
+    collapsed = pd.concat([grouped[numeric_cols].mean(), grouped[other_cols].first()], axis=1)
+    return collapsed.reset_index()[df.columns]
+
+
+def aggregate_neighbours(target: SpatialTarget, block: pd.DataFrame, matches: pd.DataFrame, k: int) -> pd.DataFrame:
+    """Replace the numeric columns of a joined block with inverse-distance-weighted means over k neighbours.
+
+    Coordinates and non-numeric columns keep the values of the nearest site, so
+    the block keeps the same columns as a nearest-only join.
+
+    Args:
+        target: Joined supplementary table
+        block: Nearest rows of ``target`` aligned with the hospital rows
+        matches: Output of ``spatial_join`` with the ``{name}_knn_*`` columns
+        k: Number of neighbours that were queried
+
+    Returns:
+        The block with its numeric value columns aggregated
+
+    """
+    value_cols = [
+        col
+        for col in target.df.columns
+        if col not in (target.lat_col, target.lon_col) and pd.api.types.is_numeric_dtype(target.df[col])
+    ]
+    rows = matches[[f"{target.name}_knn_row_{j}" for j in range(k)]].to_numpy()
+    distances = matches[[f"{target.name}_knn_distance_{j}" for j in range(k)]].to_numpy()
+    aggregated = idw_aggregate(target.df[value_cols].to_numpy(dtype=float), rows, distances)
+    block[value_cols] = aggregated.astype("float32")
+    return block
+
+
+def prepare_targets(
+    toilets_df: pd.DataFrame,
+    waste_df: pd.DataFrame,
+    water_df: pd.DataFrame,
+    *,
+    include_key: bool = False,
+) -> list[SpatialTarget]:
+    """Preprocess the supplementary tables into the targets of the spatial join.
+
+    Each supplementary table is collapsed to one row per Month_Year and location.
 
     Args:
-        hospital_data: DataFrame with hospital data
         toilets_df: DataFrame with toilet data
         waste_df: DataFrame with waste management data
         water_df: DataFrame with water source data
+        include_key: Whether to keep the ``*_Month_Year_lat_lon`` string keys
 
     Returns:
-        DataFrame with all data merged
+        One target per supplementary table, in toilet, waste, water order
 
     """
-    # Preprocess each dataset
-    water_sources = preprocess_water_sources(water_df)
-    toilets = preprocess_supplementary_data(toilets_df, "toilet")
-    waste_management = preprocess_supplementary_data(waste_df, "waste")
-
-    # Merge datasets with nearest locations
-    merged_data = hospital_data.copy()
-    datasets = [
-        (toilets, "toilet", "toilet_Month_Year_lat_lon"),
-        (waste_management, "waste", "waste_Month_Year_lat_lon"),
-        (water_sources, "water", "water_Month_Year_lat_lon"),
+    water_sources = preprocess_water_sources(water_df, include_key=include_key)
+    toilets = preprocess_supplementary_data(toilets_df, "toilet", include_key=include_key)
+    waste_management = preprocess_supplementary_data(waste_df, "waste", include_key=include_key)
+    return [
+        SpatialTarget(
+            prefix,
+            deduplicate_supplementary(df, prefix).reset_index(drop=True),
+            f"{prefix}_Transformed_Latitude",
+            f"{prefix}_Transformed_Longitude",
+            month_year_col=f"{prefix}_Month_Year",
+        )
+        for df, prefix in [
+            (toilets, "toilet"),
+            (waste_management, "waste"),
+            (water_sources, "water"),
+        ]
     ]
 
-    # Process and merge each dataset
-    for df, prefix, id_col in [
-        (toilets, "toilet", "toilet_Month_Year_lat_lon"),
-        (waste_management, "waste", "waste_Month_Year_lat_lon"),
-        (water_sources, "water", "water_Month_Year_lat_lon"),
-    ]:
-        nearest = find_nearest(
+
+def update_cubes(targets: list[SpatialTarget], *, prune: bool = True) -> dict[str, SupplementaryCube]:
+    """Refresh the spatio-temporal cube of every target for new or changed months.
+
+    Args:
+        targets: Targets returned by ``prepare_targets``
+        prune: Remove cube months absent from the targets (disable for partial inputs)
+
+    Returns:
+        Cube of each target by name, empty when ``cube_cell_size`` is not set
+
+    """
+    if not CUBE_CELL_SIZE:
+        return {}
+    cube_dir = ensure_dir(get_cache_dir() / "cube")
+    return {
+        target.name: update_cube(target.df, target.name, cube_dir / target.name, CUBE_CELL_SIZE, prune=prune)
+        for target in targets
+    }
+
+
+def join_features(
+    hospital_data: pd.DataFrame,
+    targets: list[SpatialTarget],
+    join_options: dict[str, Any],
+    workers: int = QUERY_WORKERS,
+) -> pd.DataFrame:
+    """Join every target, reusing the cached join columns of unchanged sources.
+
+    Args:
+        hospital_data: DataFrame with hospital data
+        targets: Targets returned by ``prepare_targets``
+        join_options: Settings passed to ``spatial_join`` that the cached columns depend on
+        workers: Thread budget of the spatial join
+
+    Returns:
+        DataFrame with the ``spatial_join`` columns of every target, aligned with ``hospital_data``
+
+    """
+    # Reuse the join columns of sources whose locations, hospitals and settings are unchanged
+    feature_dir = get_feature_cache_dir()
+    cached, keys = {}, {}
+    if feature_dir is not None:
+        hospital_key = hospital_fingerprint(hospital_data, "Transformed_Latitude", "Transformed_Longitude")
+        for target in targets:
+            keys[target.name] = feature_key(target, hospital_key, join_options)
+            columns = load_features(feature_dir, target.name, keys[target.name], hospital_data.index)
+            if columns is not None:
+                cached[target.name] = columns
+
+    missing = [target for target in targets if target.name not in cached]
+    if missing:
+        joined = spatial_join(
             hospital_data,
-            df,
-            f"{prefix}_Transformed_Latitude",
-            f"{prefix}_Transformed_Longitude",
-            id_col,
+            missing,
+            **join_options,
+            recall_sample=RECALL_SAMPLE,
+            workers=workers,
+            cache_dir=get_index_cache_dir(),
         )
-        nearest_df = pd.DataFrame(list(nearest.items()), columns=["ID", id_col])
-        hospital_data = hospital_data.merge(nearest_df, on="ID").merge(df, on=id_col)
+        for target in missing:
+            cached[target.name] = joined[[col for col in joined.columns if col.startswith(f"{target.name}_")]]
+            if feature_dir is not None:
+                save_features(feature_dir, target.name, keys[target.name], cached[target.name])
+    return pd.concat([cached[target.name] for target in targets], axis=1)
 
-    return hospital_data
 
-# Save processed datasets to S3
-logger.info("Uploading processed datasets to S3...")
-TRAIN_CUTOFF_YEAR = 2023
-def save_processed_data(merged_data: pd.DataFrame, user_bucket: str) -> None:
-    """Save processed train and test datasets to S3.
+def enrich_hospital_rows(
+    hospital_data: pd.DataFrame,
+    targets: list[SpatialTarget],
+    cubes: dict[str, SupplementaryCube],
+    workers: int = QUERY_WORKERS,
+) -> pd.DataFrame:
+    """Attach the supplementary features to a block of hospital rows.
 
     Args:
-        merged_data: DataFrame containing processed data
-        user_bucket: S3 bucket to save results
+        hospital_data: DataFrame with hospital data
+        targets: Targets returned by ``prepare_targets``
+        cubes: Cubes returned by ``update_cubes``
+        workers: Thread budget of the spatial join
+
+    Returns:
+        DataFrame with one row per hospital row and the columns of every target
+
+    Raises:
+        DataError: If the joined frame does not have one row per hospital row
+
+    """
+    join_options = {
+        "month_window": MONTH_WINDOW,
+        "max_distance": MAX_DISTANCE,
+        "radii": DENSITY_RADII,
+        "k": NEIGHBOURS,
+        "coordinate_mode": COORDINATE_MODE,
+        "backend": SPATIAL_BACKEND,
+        "eps": APPROXIMATE_EPS,
+        "sample_fraction": REFERENCE_SAMPLE,
+    }
+
+    matches = join_features(hospital_data, targets, join_options, workers)
+
+    # Attach each dataset by position
+    blocks = [hospital_data]
+    for target in targets:
+        rows = matches[f"{target.name}_nearest_row"].to_numpy()
+        unmatched = int((rows < 0).sum())
+        if unmatched:
+            logger.warning(f"No {target.name} location matched for {unmatched} of {len(rows)} rows")
+        # Reindexing a RangeIndex by row id is a positional take; -1 yields an all-NaN row
+        block = target.df.reindex(rows)
+        block.index = hospital_data.index
+        if NEIGHBOURS > 1:
+            block = aggregate_neighbours(target, block, matches, NEIGHBOURS)
+        blocks.append(block)
+
+    # The distances come from the same query that found the rows; unmatched rows get NaN
+    distance_cols = [f"{target.name}_nearest_distance" for target in targets]
+    blocks.append(matches[distance_cols].replace(np.inf, np.nan).astype("float32"))
+    count_cols = [f"{target.name}_within_{radius:g}" for target in targets for radius in sorted(DENSITY_RADII)]
+    blocks.append(matches[count_cols])
+
+    # Cell statistics from the spatio-temporal cube
+    for name, cube in cubes.items():
+        blocks.append(cube_features(hospital_data, cube, name))
+
+    merged_data = pd.concat(blocks, axis=1)
+    if len(merged_data) != len(hospital_data):
+        raise DataError(f"Join produced {len(merged_data)} rows for {len(hospital_data)} hospital rows")
+    return merged_data
+
+
+def process_data(
+    hospital_data: pd.DataFrame,
+    toilets_df: pd.DataFrame,
+    waste_df: pd.DataFrame,
+    water_df: pd.DataFrame,
+    *,
+    include_key: bool = False,
+    partial: bool = False,
+) -> pd.DataFrame:
+    """Process and merge all datasets.
+
+    Each supplementary table is collapsed to one row per Month_Year and location,
+    and its columns are attached to the hospital rows by positional indexing with
+    the row ids returned by ``spatial_join``. The join columns of each source are
+    cached per source, so only sources whose locations changed since an earlier
+    run with the same hospitals and settings are joined again. The distance to
+    each matched row, which the same query already computed, is kept as a
+    ``{prefix}_nearest_distance`` feature, and when ``density_radii`` are set,
+    ``{prefix}_within_{radius}`` site counts are added from the same indexes.
+    With ``neighbours`` above 1 the numeric columns are inverse-distance-weighted
+    means over that many nearest sites instead of the nearest site's values.
+    With ``cube_cell_size`` set, per-cell monthly site counts and means are
+    added from the supplementary cube.
+    The output has exactly one row per hospital row and is assembled in a
+    single concatenation.
+
+    Args:
+        hospital_data: DataFrame with hospital data
+        toilets_df: DataFrame with toilet data
+        waste_df: DataFrame with waste management data
+        water_df: DataFrame with water source data
+        include_key: Whether to keep the ``*_Month_Year_lat_lon`` string keys in the output
+        partial: The inputs only hold some months (incremental update), so months
+            missing from them are kept in the supplementary cube
+
+    Returns:
+        DataFrame with all data merged
+
+    Raises:
+        DataError: If the joined frame does not have one row per hospital row
+
+    """
+    targets = prepare_targets(toilets_df, waste_df, water_df, include_key=include_key)
+    cubes = update_cubes(targets, prune=not partial)
+    processes = get_prep_processes()
+    if processes > 1 and hospital_data["Year"].nunique() > 1:
+        return enrich_in_processes(hospital_data, targets, cubes, processes)
+    return enrich_hospital_rows(hospital_data, targets, cubes)
+
+
+def get_prep_processes() -> int:
+    """Get the number of processes enriching the hospital rows.
+
+    Returns:
+        ``prep_processes``, with -1 resolved to the vCPUs of the script processor instance type
 
     """
-    processed_train = merged_data[merged_data["Year"] < TRAIN_CUTOFF_YEAR]
-    processed_test = merged_data[merged_data["Year"] == TRAIN_CUTOFF_YEAR]
+    return get_instance_vcpus() if PREP_PROCESSES < 0 else max(1, PREP_PROCESSES)
+
+
+# Targets and cubes of a process pool worker, set once by ``_init_worker``
+_worker_state: dict[str, object] = {}
+
+
+def _init_worker(targets: list[SpatialTarget], cubes: dict[str, SupplementaryCube], workers: int) -> None:
+    """Keep the targets and cubes a worker process enriches its partitions with."""
+    _worker_state.update(targets=targets, cubes=cubes, workers=workers)
 
-    train_output_path = f"s3://{user_bucket}/processed_train.csv"
-    test_output_path = f"s3://{user_bucket}/processed_test.csv"
 
-    logger.info(f"Saving processed train dataset to {train_output_path}")
-    processed_train.to_csv(train_output_path, index=False)
+def _enrich_partition(hospital_data: pd.DataFrame) -> pd.DataFrame:
+    """Enrich one partition of hospital rows in a worker process."""
+    return enrich_hospital_rows(
+        hospital_data, _worker_state["targets"], _worker_state["cubes"], workers=_worker_state["workers"]
+    )
+
 
-    logger.info(f"Saving processed test dataset to {test_output_path}")
-    processed_test.to_csv(test_output_path, index=False)
+def enrich_in_processes(
+    hospital_data: pd.DataFrame,
+    targets: list[SpatialTarget],
+    cubes: dict[str, SupplementaryCube],
+    processes: int,
+) -> pd.DataFrame:
+    """Enrich the hospital rows partitioned by Year in a pool of processes.
 
+    The spatial indexes are built once and stored in the index cache before the
+    pool starts, so every worker memory-maps the same read-only files instead of
+    receiving a pickled copy; only the targets' tables are sent, once per
+    worker. The partition outputs are put back in the original row order.
+
+    Args:
+        hospital_data: DataFrame with hospital data
+        targets: Targets returned by ``prepare_targets``
+        cubes: Cubes returned by ``update_cubes``
+        processes: Maximum number of worker processes
+
+    Returns:
+        The same frame ``enrich_hospital_rows`` returns for all rows at once
+
+    """
+    index_dir = get_index_cache_dir()
+    if index_dir is not None:
+        build_target_indexes(
+            targets,
+            index_dir,
+            coordinate_mode=COORDINATE_MODE,
+            sample_fraction=REFERENCE_SAMPLE,
+            backend=SPATIAL_BACKEND,
+        )
+    else:
+        logger.warning("The spatial index cache is disabled, so every worker builds its own indexes")
+
+    partitions = list(hospital_data.groupby("Year", sort=True, dropna=False).indices.values())
+    processes = min(processes, len(partitions))
+    budget = (os.cpu_count() or 1) if QUERY_WORKERS < 1 else QUERY_WORKERS
+    logger.info(f"Enriching {len(hospital_data)} rows in {len(partitions)} Year partitions with {processes} processes")
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(targets, cubes, max(1, budget // processes)),
+    ) as executor:
+        results = list(executor.map(_enrich_partition, (hospital_data.iloc[rows] for rows in partitions)))
+
+    merged_data = pd.concat(results)
+    return merged_data.iloc[np.argsort(np.concatenate(partitions), kind="stable")]
+
+# Save processed datasets to S3
+logger.info("Uploading processed datasets to S3...")
+def save_processed_data(merged_data: pd.DataFrame, user_bucket: str, *, replace: bool = True) -> None:
+    """Save the processed dataset to S3.
+
+    Args:
+        merged_data: DataFrame containing processed data
+        user_bucket: S3 bucket to save results
+        replace: Replace the whole dataset; when False only the partitions in ``merged_data`` are rewritten
+
+    """
+    output_path = write_processed(merged_data, f"s3://{user_bucket}", replace=replace)
+    logger.info(f"Saved processed dataset to {output_path}")
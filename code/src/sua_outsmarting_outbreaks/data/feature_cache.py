@@ -0,0 +1,116 @@
+"""Per-source cache of the spatial join columns.
+
+The columns ``spatial_join`` produces for one supplementary source (matched
+row ids, distances, neighbours and site counts) only depend on that source's
+locations and months, on the hospital locations and months, and on the join
+settings. They are stored as one Parquet file per source keyed by a hash of
+exactly those inputs, so changing one source recomputes only its join while
+the other sources' columns are read back and reattached by row id.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+from sua_outsmarting_outbreaks.utils.spatial import SpatialTarget, month_year_to_period, year_month_to_period
+from sua_outsmarting_outbreaks.utils.spatial_cache import array_hash
+
+logger = setup_logger(__name__)
+
+# Bump when the cached columns change meaning
+FEATURE_CACHE_VERSION = 1
+
+
+def hospital_fingerprint(hospital_df: pd.DataFrame, lat_col: str, lon_col: str) -> str:
+    """Hash the hospital coordinates and months the join is queried with.
+
+    Args:
+        hospital_df: DataFrame with hospital coordinates and ``Year``/``Month``
+        lat_col: Name of the latitude column
+        lon_col: Name of the longitude column
+
+    Returns:
+        Hex digest of the query set, in row order
+
+    """
+    points = hospital_df[[lat_col, lon_col]].to_numpy(dtype=float)
+    return array_hash(points, year_month_to_period(hospital_df["Year"], hospital_df["Month"]))
+
+
+def feature_key(target: SpatialTarget, hospital_key: str, options: dict[str, Any]) -> str:
+    """Compute the cache key of one source's join columns.
+
+    Args:
+        target: Supplementary source being joined
+        hospital_key: Fingerprint returned by ``hospital_fingerprint``
+        options: Join settings that affect the output columns
+
+    Returns:
+        Hex digest identifying the source locations, the query set and the settings
+
+    """
+    points = target.df[[target.lat_col, target.lon_col]].to_numpy(dtype=float)
+    periods = (
+        month_year_to_period(target.df[target.month_year_col])
+        if target.month_year_col is not None
+        else np.zeros(0, dtype=np.int64)
+    )
+    payload = {
+        "version": FEATURE_CACHE_VERSION,
+        "source": array_hash(points, periods),
+        "hospitals": hospital_key,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _entry(cache_dir: Path, name: str, key: str) -> Path:
+    """Path of the cache file of one source and key."""
+    return Path(cache_dir) / f"{name}_{key[:32]}.parquet"
+
+
+def load_features(cache_dir: Path, name: str, key: str, index: pd.Index) -> pd.DataFrame | None:
+    """Read the cached join columns of one source.
+
+    Args:
+        cache_dir: Feature cache directory
+        name: Source name (the column prefix)
+        key: Key returned by ``feature_key``
+        index: Index of the hospital rows the columns are aligned with
+
+    Returns:
+        Cached columns aligned with ``index``, or None on a miss
+
+    """
+    path = _entry(cache_dir, name, key)
+    if not path.exists():
+        return None
+    columns = pd.read_parquet(path)
+    if len(columns) != len(index):
+        logger.warning(f"Ignoring feature cache entry {path} with {len(columns)} rows for {len(index)} hospital rows")
+        return None
+    logger.info(f"Feature cache hit for {name}: {path.name}")
+    columns.index = index
+    return columns
+
+
+def save_features(cache_dir: Path, name: str, key: str, columns: pd.DataFrame) -> None:
+    """Store the join columns of one source, replacing the file atomically.
+
+    Args:
+        cache_dir: Feature cache directory
+        name: Source name (the column prefix)
+        key: Key returned by ``feature_key``
+        columns: Join columns of the source, aligned with the hospital rows
+
+    """
+    path = _entry(cache_dir, name, key)
+    staging = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    columns.reset_index(drop=True).to_parquet(staging, index=False)
+    os.replace(staging, path)
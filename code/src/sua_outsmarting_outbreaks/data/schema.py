@@ -0,0 +1,179 @@
+"""Column dtype schemas for the raw inputs and the processed datasets."""
+
+import pandas as pd
+
+# Raw input files keyed by dataset name
+RAW_FILES: dict[str, str] = {
+    "train": "Train.csv",
+    "test": "Test.csv",
+    "toilets": "toilets.csv",
+    "waste_management": "waste_management.csv",
+    "water_sources": "water_sources.csv",
+}
+
+# Column prefix of each supplementary dataset
+SUPPLEMENTARY_PREFIXES: dict[str, str] = {
+    "toilets": "toilet",
+    "waste_management": "waste",
+    "water_sources": "water",
+}
+
+# Declared dtypes of the hospital files (Train.csv and Test.csv)
+HOSPITAL_DTYPES: dict[str, str] = {
+    "Total": "float32",
+    "Location": "category",
+    "Category_Health_Facility_UUID": "category",
+    "Disease": "category",
+    "Month": "int8",
+    "Year": "int16",
+    "Transformed_Latitude": "float32",
+    "Transformed_Longitude": "float32",
+}
+
+
+def supplementary_dtypes(prefix: str) -> dict[str, str]:
+    """Get the declared dtypes of a supplementary file.
+
+    Args:
+        prefix: Column prefix of the dataset (e.g. 'toilet')
+
+    Returns:
+        Mapping of column name to dtype
+
+    """
+    return {
+        f"{prefix}_Month_Year": "category",
+        f"{prefix}_Transformed_Latitude": "float32",
+        f"{prefix}_Transformed_Longitude": "float32",
+    }
+
+
+def raw_dtypes(name: str) -> dict[str, str]:
+    """Get the declared dtypes of a raw input file.
+
+    Args:
+        name: Dataset name, one of ``RAW_FILES``
+
+    Returns:
+        Mapping of column name to dtype
+
+    Raises:
+        ValueError: If the dataset name is unknown
+
+    """
+    if name in ("train", "test"):
+        return HOSPITAL_DTYPES
+    if name in SUPPLEMENTARY_PREFIXES:
+        return supplementary_dtypes(SUPPLEMENTARY_PREFIXES[name])
+    raise ValueError(f"Unknown raw dataset '{name}', expected one of {list(RAW_FILES)}")
+
+
+def apply_raw_schema(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Cast a raw input frame to its declared dtypes.
+
+    Declared columns use ``raw_dtypes``. Undeclared float columns (the
+    supplementary measurements) are downcast to ``float32``, and undeclared
+    non-negative integer columns of the supplementary files (counts) to the
+    smallest integer dtype holding their values. Integer columns that turn out
+    to contain missing values are kept as ``float32``.
+
+    Args:
+        df: Raw input DataFrame
+        name: Dataset name, one of ``RAW_FILES``
+
+    Returns:
+        DataFrame with the declared dtypes applied
+
+    """
+    declared = raw_dtypes(name)
+    dtypes = {}
+    for col in df.columns:
+        dtype = declared.get(col)
+        if dtype is None and pd.api.types.is_float_dtype(df[col]):
+            dtype = "float32"
+        # Supplementary files are read whole, so the narrowest dtype is the same for every row
+        if dtype is None and name in SUPPLEMENTARY_PREFIXES and _is_count(df[col]):
+            dtype = str(pd.to_numeric(df[col], downcast="integer").dtype)
+        if dtype is not None and dtype.startswith("int") and df[col].isna().any():
+            dtype = "float32"
+        if dtype is not None and df[col].dtype != dtype:
+            dtypes[col] = dtype
+    return df.astype(dtypes) if dtypes else df
+
+
+def _is_count(values: pd.Series) -> bool:
+    """Check whether a column holds non-negative integers."""
+    is_integer = pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values)
+    return is_integer and len(values) > 0 and values.min() >= 0
+
+
+# Explicit dtypes for the numeric hospital columns of the processed datasets
+PROCESSED_DTYPES: dict[str, str] = {
+    "Total": "float32",
+    "Month": "int8",
+    "Year": "int16",
+    "Transformed_Latitude": "float32",
+    "Transformed_Longitude": "float32",
+}
+
+# Storage dtype of the ``{prefix}_within_{radius}`` site counts of the spatial join
+DENSITY_COUNT_DTYPE = "int32"
+
+# Storage dtype of every other numeric column (supplementary measurements and counts, cube statistics)
+FEATURE_DTYPE = "float32"
+
+
+def processed_dtype(col: str) -> str | None:
+    """Get the declared storage dtype of a processed column from its name.
+
+    The dtype never depends on the values, so every partition or chunk of the
+    processed dataset is written with the same schema.
+
+    Args:
+        col: Column name
+
+    Returns:
+        The dtype, or None for columns that are not declared by name
+
+    """
+    if col in PROCESSED_DTYPES:
+        return PROCESSED_DTYPES[col]
+    if "_within_" in col:
+        return DENSITY_COUNT_DTYPE
+    return None
+
+
+def apply_processed_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast a processed dataset to its storage dtypes.
+
+    Known columns use ``processed_dtype`` and all other numeric columns,
+    including the integer supplementary counts, are stored as ``float32``, which
+    is the precision the model trains on. Categorical
+    columns are decoded to plain strings so downstream stages can fill and
+    label-encode them like any other text column.
+
+    Args:
+        df: Processed DataFrame
+
+    Returns:
+        DataFrame with explicit dtypes applied
+
+    """
+    # Decode categoricals first (Parquet partition columns are read back as categories)
+    categorical = {
+        col: df[col].cat.categories.dtype for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    if categorical:
+        df = df.astype(categorical)
+
+    dtypes = {}
+    for col in df.columns:
+        dtype = processed_dtype(col)
+        if dtype is None and pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            dtype = FEATURE_DTYPE
+        # Integer columns with missing values cannot be cast, keep them as floats
+        if dtype is not None and dtype.startswith("int") and df[col].isna().any():
+            dtype = "float32"
+        if dtype is not None and df[col].dtype != dtype:
+            dtypes[col] = dtype
+    return df.astype(dtypes) if dtypes else df
@@ -0,0 +1,272 @@
+"""Read and write processed datasets in a selectable storage format.
+
+Parquet output is a Hive-style partitioned dataset (``processed/Year=…/Month=…``)
+so loaders can push year and month filters down and only read the partitions
+they need. CSV output keeps the legacy ``processed_train.csv`` and
+``processed_test.csv`` files split at ``TRAIN_CUTOFF_YEAR``.
+"""
+
+from collections.abc import Iterable
+from pathlib import Path
+
+import fsspec
+import numpy as np
+import pandas as pd
+from pyarrow import dataset as pa_dataset
+
+from sua_outsmarting_outbreaks.data.csv_reader import read_csv
+from sua_outsmarting_outbreaks.data.schema import PROCESSED_DTYPES, apply_processed_schema
+from sua_outsmarting_outbreaks.utils.constants import (
+    PARQUET_COMPRESSION,
+    STORAGE_FORMAT,
+    TRAIN_CUTOFF_YEAR,
+    TRAIN_MIN_YEAR,
+)
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+STORAGE_FORMATS = ("parquet", "csv")
+PROCESSED_DATASET = "processed"
+PARTITION_COLUMNS = ["Year", "Month"]
+CSV_SPLITS = ("processed_train", "processed_test")
+
+
+def _check_format(fmt: str) -> None:
+    """Raise a ValueError for unsupported storage formats."""
+    if fmt not in STORAGE_FORMATS:
+        raise ValueError(f"Unsupported storage format '{fmt}', expected one of {STORAGE_FORMATS}")
+
+
+def _join(base: str | Path, name: str) -> str:
+    """Join a local directory or S3 prefix with a relative name."""
+    return f"{str(base).rstrip('/')}/{name}"
+
+
+def processed_location(split: str, fmt: str = STORAGE_FORMAT) -> str:
+    """Get the location of a processed split relative to the output prefix.
+
+    Args:
+        split: 'processed_train' or 'processed_test'
+        fmt: Storage format, one of ``STORAGE_FORMATS``
+
+    Returns:
+        Relative path of the file (CSV) or dataset directory (Parquet) holding the split
+
+    Raises:
+        ValueError: If the format or split is not supported
+
+    """
+    _check_format(fmt)
+    if split not in CSV_SPLITS:
+        raise ValueError(f"Unknown split '{split}', expected one of {CSV_SPLITS}")
+    if fmt == "csv":
+        return f"{split}.csv"
+    if split == "processed_test":
+        return f"{PROCESSED_DATASET}/Year={TRAIN_CUTOFF_YEAR}/"
+    return f"{PROCESSED_DATASET}/"
+
+
+def split_locations(base: str | Path, split: str, fmt: str = STORAGE_FORMAT) -> list[str]:
+    """List the locations holding exactly one processed split, relative to the output prefix.
+
+    The Parquet training split is not one directory: ``processed/`` also holds the
+    held-out ``TRAIN_CUTOFF_YEAR`` partitions. It is listed as one ``Year=…``
+    directory per training year instead, so jobs given these locations never
+    receive test rows.
+
+    Args:
+        base: Local directory or S3 prefix the dataset was written to
+        split: 'processed_train' or 'processed_test'
+        fmt: Storage format, one of ``STORAGE_FORMATS``
+
+    Returns:
+        Relative paths of the files or directories of the split
+
+    """
+    location = processed_location(split, fmt)
+    if fmt == "csv" or split == "processed_test":
+        return [location]
+
+    fs, root = fsspec.core.url_to_fs(_join(base, PROCESSED_DATASET))
+    years = sorted(
+        int(name.rsplit("=", 1)[1])
+        for name in (path.rstrip("/").rsplit("/", 1)[-1] for path in fs.ls(root, detail=False))
+        if name.startswith("Year=")
+    )
+    first_year = TRAIN_MIN_YEAR if TRAIN_MIN_YEAR is not None else min(years, default=TRAIN_CUTOFF_YEAR)
+    return [f"{PROCESSED_DATASET}/Year={year}/" for year in years if first_year <= year < TRAIN_CUTOFF_YEAR]
+
+
+def write_processed(
+    df: pd.DataFrame,
+    base: str | Path,
+    fmt: str = STORAGE_FORMAT,
+    *,
+    replace: bool = True,
+    chunk: int | None = None,
+) -> str:
+    """Write the processed dataset with explicit dtypes.
+
+    Args:
+        df: Processed DataFrame containing all years
+        base: Local directory or S3 prefix
+        fmt: Storage format, one of ``STORAGE_FORMATS``
+        replace: For Parquet, remove the whole existing dataset first. When False only the
+            partitions present in ``df`` are overwritten and all others are kept.
+        chunk: For Parquet, the position of ``df`` in a sequence of row chunks. The files
+            are named after the chunk and added next to the files already in each
+            partition, so chunks written in order read back in the same order.
+
+    Returns:
+        Path the dataset was written to
+
+    """
+    _check_format(fmt)
+    df = apply_processed_schema(df)
+
+    if fmt == "csv":
+        splits = {
+            "processed_train": df[df["Year"] < TRAIN_CUTOFF_YEAR],
+            "processed_test": df[df["Year"] == TRAIN_CUTOFF_YEAR],
+        }
+        for split, split_df in splits.items():
+            path = _join(base, f"{split}.csv")
+            logger.info(f"Saving {split} ({split_df.shape[0]} rows) to {path}")
+            split_df.to_csv(path, index=False)
+        return str(base)
+
+    path = _join(base, PROCESSED_DATASET)
+    fs, root = fsspec.core.url_to_fs(path)
+    if replace and fs.exists(root):
+        logger.info(f"Removing existing processed dataset at {path}")
+        fs.rm(root, recursive=True)
+
+    logger.info(f"Saving processed dataset ({df.shape[0]} rows) to {path} partitioned by {PARTITION_COLUMNS}")
+    df.to_parquet(
+        path,
+        index=False,
+        compression=PARQUET_COMPRESSION,
+        partition_cols=PARTITION_COLUMNS,
+        existing_data_behavior="delete_matching" if chunk is None else "overwrite_or_ignore",
+        basename_template="part-{i}.parquet" if chunk is None else f"part-{chunk:06d}-{{i}}.parquet",
+    )
+    return path
+
+
+def remove_partitions(base: str | Path, partitions: Iterable[tuple[int, int]]) -> None:
+    """Delete ``Year=…/Month=…`` partitions from the Parquet dataset.
+
+    Args:
+        base: Local directory or S3 prefix
+        partitions: (year, month) pairs to delete; missing partitions are ignored
+
+    """
+    for year, month in partitions:
+        path = _join(base, f"{PROCESSED_DATASET}/Year={year}/Month={month}")
+        fs, root = fsspec.core.url_to_fs(path)
+        if fs.exists(root):
+            logger.info(f"Removing partition {path}")
+            fs.rm(root, recursive=True)
+
+
+def read_processed(
+    base: str | Path,
+    fmt: str = STORAGE_FORMAT,
+    *,
+    min_year: int | None = None,
+    max_year: int | None = None,
+    months: Iterable[int] | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """Read rows of the processed dataset written by ``write_processed``.
+
+    For Parquet the year and month filters are pushed down to the partition
+    layout, so only matching ``Year=…/Month=…`` directories are read. Both
+    formats return the same frame: rows sorted by Year and Month, keeping the
+    written order within a month, and columns in the written order.
+
+    Args:
+        base: Local directory or S3 prefix
+        fmt: Storage format, one of ``STORAGE_FORMATS``
+        min_year: Optional first year to include
+        max_year: Optional last year to include
+        months: Optional months (1-12) to include
+        columns: Optional subset of columns to read
+
+    Returns:
+        DataFrame with the processed schema applied
+
+    """
+    _check_format(fmt)
+    months = sorted(months) if months is not None else None
+    # The partition columns are always read, to order the rows
+    read_columns = None if columns is None else list(dict.fromkeys([*columns, *PARTITION_COLUMNS]))
+
+    if fmt == "parquet":
+        df, written = _read_parquet(base, min_year, max_year, months, read_columns)
+    else:
+        df, written = _read_csv(base, min_year, max_year, months, read_columns)
+
+    df = apply_processed_schema(df).sort_values(PARTITION_COLUMNS, kind="stable", ignore_index=True)
+    order = [col for col in written if col in df.columns and (columns is None or col in columns)]
+    return df[order]
+
+
+def _read_parquet(
+    base: str | Path,
+    min_year: int | None,
+    max_year: int | None,
+    months: list[int] | None,
+    columns: list[str] | None,
+) -> tuple[pd.DataFrame, list[str]]:
+    """Read the matching partitions and the written column order of the Parquet dataset."""
+    path = _join(base, PROCESSED_DATASET)
+    filters = []
+    if min_year is not None:
+        filters.append(("Year", ">=", min_year))
+    if max_year is not None:
+        filters.append(("Year", "<=", max_year))
+    if months is not None:
+        filters.append(("Month", "in", months))
+    logger.info(f"Reading processed dataset from {path} with filters {filters}")
+    df = pd.read_parquet(path, columns=columns, filters=filters or None)
+
+    # Partition columns are read back last; the pandas metadata of the files keeps the written order
+    fs, root = fsspec.core.url_to_fs(path)
+    metadata = pa_dataset.dataset(root, filesystem=fs, partitioning="hive").schema.pandas_metadata
+    written = [col["name"] for col in metadata["columns"]] if metadata else list(df.columns)
+    return df, written
+
+
+def _read_csv(
+    base: str | Path,
+    min_year: int | None,
+    max_year: int | None,
+    months: list[int] | None,
+    columns: list[str] | None,
+) -> tuple[pd.DataFrame, list[str]]:
+    """Read the split files that can hold the requested years and filter their rows."""
+    splits = []
+    if min_year is None or min_year < TRAIN_CUTOFF_YEAR:
+        splits.append("processed_train")
+    if max_year is None or max_year >= TRAIN_CUTOFF_YEAR:
+        splits.append("processed_test")
+
+    # Integer columns are cast afterwards so missing values do not fail the parse
+    dtypes = {col: dtype for col, dtype in PROCESSED_DTYPES.items() if not dtype.startswith("int")}
+    frames = []
+    for split in splits:
+        path = _join(base, f"{split}.csv")
+        logger.info(f"Reading {split} from {path}")
+        frames.append(read_csv(path, dtype=dtypes, usecols=columns))
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    mask = np.ones(len(df), dtype=bool)
+    if min_year is not None:
+        mask &= df["Year"].to_numpy() >= min_year
+    if max_year is not None:
+        mask &= df["Year"].to_numpy() <= max_year
+    if months is not None:
+        mask &= df["Month"].isin(months).to_numpy()
+    return (df if mask.all() else df[mask]), list(df.columns)
@@ -3,13 +3,14 @@
 
 import boto3
 import joblib
-import pandas as pd
 from sklearn.metrics import mean_absolute_error
 from sklearn.preprocessing import LabelEncoder
 
+from sua_outsmarting_outbreaks.data.storage import read_processed
 from sua_outsmarting_outbreaks.utils.aws_utils import (
     initialize_aws_resources,
 )
+from sua_outsmarting_outbreaks.utils.constants import TRAIN_CUTOFF_YEAR
 from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
 
 # Configure logger
@@ -34,9 +35,7 @@ def evaluate_model(data_dir: str | None = None) -> None:
     # Load Test Dataset
     logger.info("\nStarting model evaluation process...")
     logger.info("Downloading preprocessed test dataset from S3...")
-    test_data_path = f"s3://{user_bucket_name}/processed_test.csv"
-    logger.info(f"Reading test data from: {test_data_path}")
-    test_df = pd.read_csv(test_data_path)
+    test_df = read_processed(f"s3://{user_bucket_name}", min_year=TRAIN_CUTOFF_YEAR, max_year=TRAIN_CUTOFF_YEAR)
     logger.info(f"Test dataset shape: {test_df.shape}")
 
     # Load the trained model from S3
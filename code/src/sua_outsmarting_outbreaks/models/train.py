@@ -19,11 +19,12 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 
+from sua_outsmarting_outbreaks.data.storage import processed_location, read_processed
 from sua_outsmarting_outbreaks.utils.aws_utils import (
     get_script_processor_type,
     initialize_aws_resources,
 )
-from sua_outsmarting_outbreaks.utils.constants import INSTANCE_SPECS
+from sua_outsmarting_outbreaks.utils.constants import INSTANCE_SPECS, TRAIN_CUTOFF_YEAR, TRAIN_MIN_YEAR
 from sua_outsmarting_outbreaks.utils.logging_utils import (
     DataError,
     ModelError,
@@ -76,10 +77,10 @@ def load_training_data(bucket_name: str) -> pd.DataFrame:
 
     """
     logger.info("Downloading preprocessed training data from S3...")
-    train_data_path = f"s3://{bucket_name}/processed_train.csv"
+    train_data_path = f"s3://{bucket_name}/{processed_location('processed_train')}"
 
     try:
-        train_df = pd.read_csv(train_data_path)
+        train_df = read_processed(f"s3://{bucket_name}", min_year=TRAIN_MIN_YEAR, max_year=TRAIN_CUTOFF_YEAR - 1)
 
         if train_df.empty:
             raise DataError("Training data file is empty")
@@ -133,7 +134,7 @@ def load_data(data_dir: str | None = None) -> pd.DataFrame:
     """
     if data_dir:
         log_system_info()
-        train_df = pd.read_csv(Path(data_dir) / "processed_train.csv")
+        train_df = read_processed(Path(data_dir), min_year=TRAIN_MIN_YEAR, max_year=TRAIN_CUTOFF_YEAR - 1)
         logger.info(f"Loaded local training data with shape: {train_df.shape}")
     else:
         train_df = load_training_data(user_bucket_name)
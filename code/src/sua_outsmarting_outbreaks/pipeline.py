@@ -22,6 +22,7 @@ import sagemaker
 from sagemaker.image_uris import retrieve as retrieve_image_uri
 from sagemaker.processing import ProcessingInput, ProcessingOutput, ScriptProcessor
 
+from sua_outsmarting_outbreaks.data.storage import processed_location, split_locations
 from sua_outsmarting_outbreaks.utils.aws_utils import (
     get_data_bucket_name,
     get_execution_role,
@@ -137,14 +138,16 @@ def run_data_preparation(
 run_data_preparation(script_processor, input_prefix, output_prefix, data_prep_script)
 
 # Execute Model Training Script
+# Only the training years are shipped; the held-out test year stays out of the training job
 logger.info("Starting Model Training Job...")
 training_job = script_processor.run(
     code=model_training_script,
     inputs=[
         ProcessingInput(
-            source=output_prefix + "data_prep/processed_train.csv",
-            destination="/opt/ml/processing/input",
-        ),
+            source=output_prefix + "data_prep/" + location,
+            destination="/opt/ml/processing/input/" + location,
+        )
+        for location in split_locations(output_prefix + "data_prep/", "processed_train")
     ],
     outputs=[ProcessingOutput(source="/opt/ml/processing/output", destination=output_prefix + "training/")],
 )
@@ -157,7 +160,7 @@ evaluation_job = script_processor.run(
     code=model_evaluation_script,
     inputs=[
         ProcessingInput(
-            source=output_prefix + "data_prep/processed_test.csv",
+            source=output_prefix + "data_prep/" + processed_location("processed_test"),
             destination="/opt/ml/processing/input/test",
         ),
         ProcessingInput(
@@ -181,7 +184,7 @@ prediction_job = script_processor.run(
     code=model_prediction_script,
     inputs=[
         ProcessingInput(
-            source=output_prefix + "data_prep/processed_test.csv",
+            source=output_prefix + "data_prep/" + processed_location("processed_test"),
             destination="/opt/ml/processing/input/test",
         ),
         ProcessingInput(
@@ -3,12 +3,13 @@
 
 import boto3
 import joblib
-import pandas as pd
 from sklearn.preprocessing import LabelEncoder
 
+from sua_outsmarting_outbreaks.data.storage import read_processed
 from sua_outsmarting_outbreaks.utils.aws_utils import (
     initialize_aws_resources,
 )
+from sua_outsmarting_outbreaks.utils.constants import TRAIN_CUTOFF_YEAR
 from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
 
 # Configure logger
@@ -29,8 +30,7 @@ def generate_predictions(data_dir: str | None = None) -> None:
 
     # Load preprocessed test dataset from S3
     logger.info("Downloading preprocessed test dataset from S3...")
-    test_data_path = f"s3://{user_bucket_name}/processed_test.csv"
-    test_df = pd.read_csv(test_data_path)
+    test_df = read_processed(f"s3://{user_bucket_name}", min_year=TRAIN_CUTOFF_YEAR, max_year=TRAIN_CUTOFF_YEAR)
 
     # Load the trained model from S3
     model_s3_path = f"s3://{user_bucket_name}/models/random_forest_model.joblib"
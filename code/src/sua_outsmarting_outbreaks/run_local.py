@@ -5,12 +5,12 @@ import logging
 import sys
 from pathlib import Path
 
-import pandas as pd
-
 from sua_outsmarting_outbreaks.data.data_prep import preprocess_data
+from sua_outsmarting_outbreaks.data.storage import processed_location, read_processed
 from sua_outsmarting_outbreaks.models.evaluate import evaluate_model
 from sua_outsmarting_outbreaks.models.train import prepare_features, train_model
 from sua_outsmarting_outbreaks.predict.predict import generate_predictions
+from sua_outsmarting_outbreaks.utils.constants import TRAIN_CUTOFF_YEAR, TRAIN_MIN_YEAR
 from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
 
 logger = setup_logger(__name__)
@@ -41,6 +41,11 @@ def parse_args() -> argparse.Namespace:
         default=str(DEFAULT_OUTPUT_DIR),
         help="Directory for output files",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute data preparation even if the processed data is up to date",
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -77,11 +82,11 @@ def main() -> None:
             for f in Path(data_dir).glob("*.csv"):
                 logger.debug(f"- {f.name}")
 
-            preprocess_data(local_data_dir=data_dir, output_dir=str(output_dir))
+            preprocess_data(local_data_dir=data_dir, output_dir=str(output_dir), force=args.force)
 
         if args.stage in ("train", "all"):
             logger.info("Running model training...")
-            train_path = output_dir / "processed_train.csv"
+            train_path = output_dir / processed_location("processed_train")
             logger.info(f"Looking for training data at: {train_path}")
 
             if not train_path.exists():
@@ -91,7 +96,7 @@ def main() -> None:
                     logger.debug(f"- {f.name}")
                 raise FileNotFoundError(f"Training data not found at {train_path}")
 
-            train_df = pd.read_csv(train_path)
+            train_df = read_processed(output_dir, min_year=TRAIN_MIN_YEAR, max_year=TRAIN_CUTOFF_YEAR - 1)
             logger.info(f"Loaded training data with shape: {train_df.shape}")
 
             X, y = prepare_features(train_df, "Total", ["ID", "Location"])
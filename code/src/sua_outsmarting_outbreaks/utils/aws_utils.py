@@ -1,11 +1,13 @@
 """AWS utility functions for SageMaker pipeline management."""
 
 import os
+import re
 from pathlib import Path
 
 import boto3
 import botocore
 
+from sua_outsmarting_outbreaks.utils.constants import INSTANCE_SPECS
 from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
 
 # Configure logger
@@ -162,6 +164,30 @@ def get_script_processor_type() -> str:
     return os.environ.get("SCRIPT_PROCESSOR_TYPE", "ml.m5.2xlarge")
 
 
+def get_instance_vcpus(instance_type: str | None = None) -> int:
+    """Get the number of vCPUs of a SageMaker instance type.
+
+    Args:
+        instance_type: Instance type; defaults to the script processor type
+
+    Returns:
+        int: The vCPU count listed in ``INSTANCE_SPECS``, or the local CPU count
+        for instance types without specifications.
+
+    Example:
+        >>> get_instance_vcpus("ml.m5.2xlarge")
+        8
+
+    """
+    instance_type = instance_type or get_script_processor_type()
+    specs = INSTANCE_SPECS.get(instance_type)
+    match = re.search(r"(\d+) vCPUs", specs["cpu_ram"]) if specs else None
+    if match is None:
+        logger.warning(f"No vCPU count found for instance type {instance_type}, using the local CPU count")
+        return os.cpu_count() or 1
+    return int(match.group(1))
+
+
 def get_execution_role() -> str:
     """Get the appropriate execution role or user ARN based on the environment.
 
@@ -41,6 +41,118 @@ class ModelConfig(BaseModel):
     version: str = Field(default="1.0.0", description="Model version")
     framework: str = Field(default="sklearn", description="ML framework")
     framework_version: str = Field(default="0.23-1", description="Framework version")
+    train_min_year: int | None = Field(
+        default=None,
+        description="First year of processed data to train on (all years before the cutoff if unset)",
+    )
+
+
+class DataPrepConfig(BaseModel):
+    """Data preparation configuration."""
+
+    query_workers: int = Field(
+        default=-1,
+        description="Thread budget of the spatial join, shared by the sources joined concurrently (-1: all cores)",
+    )
+    max_distance: float | None = Field(
+        default=None,
+        description=(
+            "Maximum distance for a nearest-site match, in coordinate units for 'planar' and kilometres for "
+            "'geodesic' coordinate_mode (None matches at any distance)"
+        ),
+    )
+    coordinate_mode: str = Field(
+        default="planar",
+        description="'planar' for Euclidean matching on the coordinates, 'geodesic' for great-circle km on lat/lon",
+    )
+    spatial_backend: str = Field(
+        default="auto",
+        description="Nearest-neighbour backend: 'auto', 'kdtree', 'balltree' or 'grid'",
+    )
+    approximate_eps: float = Field(
+        default=0.0,
+        description="Approximation factor for nearest-site queries (0 is exact)",
+    )
+    reference_sample: float = Field(
+        default=1.0,
+        description="Share of supplementary sites indexed for the nearest-site join (1 keeps all)",
+    )
+    recall_sample: int = Field(
+        default=1000,
+        description="Hospital rows checked against an exact search when the join is approximate",
+    )
+    cube_cell_size: float | None = Field(
+        default=None,
+        description="Cell size of the supplementary spatio-temporal cube features (None disables them)",
+    )
+    neighbours: int = Field(
+        default=1,
+        description="Supplementary sites averaged per hospital row with inverse-distance weights (1 joins the nearest)",
+    )
+    density_radii: list[float] = Field(
+        default_factory=list,
+        description=(
+            "Radii for the count of supplementary sites near each hospital, in coordinate units for 'planar' "
+            "and kilometres for 'geodesic' coordinate_mode"
+        ),
+    )
+    month_window: int = Field(
+        default=0,
+        description="Months to fall back in either direction when a Month_Year has no sites",
+    )
+    duplicate_strategy: str = Field(
+        default="mean",
+        description="How to collapse supplementary rows sharing a Month_Year and location ('mean' or 'first')",
+    )
+    csv_engine: str = Field(
+        default="pandas",
+        description="CSV parser for raw and processed CSV files ('pandas' or multithreaded 'pyarrow')",
+    )
+    load_workers: int = Field(
+        default=5,
+        description="Maximum number of raw input files read concurrently",
+    )
+    index_cache: bool = Field(
+        default=False,
+        description=(
+            "Persist built spatial indexes on disk and reuse them across runs "
+            "(entries are never evicted; delete index_cache_dir to clear them)"
+        ),
+    )
+    index_cache_dir: str | None = Field(
+        default=None,
+        description="Directory for the spatial index cache (defaults to output/cache/spatial_index)",
+    )
+    prep_processes: int = Field(
+        default=1,
+        description="Processes enriching the hospital rows partitioned by Year (-1 uses the instance's vCPUs)",
+    )
+    chunk_rows: int | None = Field(
+        default=None,
+        description="Stream the hospital rows in chunks of this size to Parquet (None processes them in memory)",
+    )
+    feature_cache: bool = Field(
+        default=False,
+        description=(
+            "Cache the spatial join columns of each supplementary source and reuse them across runs "
+            "(entries are never evicted; delete output/cache/features to clear them)"
+        ),
+    )
+    incremental: bool = Field(
+        default=False,
+        description=(
+            "Only rewrite the Year/Month partitions whose inputs changed since the last run (Parquet), "
+            "based on the manifest in the output location; 'prepare --force' rewrites everything"
+        ),
+    )
+    storage_format: str = Field(
+        default="parquet",
+        description="Storage format for processed datasets ('parquet' or 'csv')",
+    )
+    parquet_compression: str = Field(
+        default="zstd",
+        description="Compression codec for Parquet output",
+    )
 
 
 class Settings(BaseSettings):
@@ -56,6 +168,7 @@ class Settings(BaseSettings):
     aws: AWSConfig = Field(default_factory=AWSConfig)
     sagemaker: SageMakerConfig = Field(default_factory=SageMakerConfig)
     model: ModelConfig = Field(default_factory=ModelConfig)
+    data_prep: DataPrepConfig = Field(default_factory=DataPrepConfig)
 
     # Project settings
     project_name: str = Field(
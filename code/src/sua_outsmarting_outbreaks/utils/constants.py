@@ -63,6 +63,34 @@ RANDOM_SEED = 42
 MODEL_VERSION = settings.model.version
 BATCH_SIZE = settings.model.batch_size
 NUM_WORKERS = settings.model.num_workers
+TRAIN_MIN_YEAR = settings.model.train_min_year
+
+# Data split: earlier years are used for training, this year for testing
+TRAIN_CUTOFF_YEAR = 2023
+
+# Data preparation settings
+QUERY_WORKERS = settings.data_prep.query_workers
+MONTH_WINDOW = settings.data_prep.month_window
+MAX_DISTANCE = settings.data_prep.max_distance
+DENSITY_RADII = settings.data_prep.density_radii
+NEIGHBOURS = settings.data_prep.neighbours
+COORDINATE_MODE = settings.data_prep.coordinate_mode
+SPATIAL_BACKEND = settings.data_prep.spatial_backend
+APPROXIMATE_EPS = settings.data_prep.approximate_eps
+REFERENCE_SAMPLE = settings.data_prep.reference_sample
+RECALL_SAMPLE = settings.data_prep.recall_sample
+CUBE_CELL_SIZE = settings.data_prep.cube_cell_size
+DUPLICATE_STRATEGY = settings.data_prep.duplicate_strategy
+LOAD_WORKERS = settings.data_prep.load_workers
+CSV_ENGINE = settings.data_prep.csv_engine
+INDEX_CACHE = settings.data_prep.index_cache
+INDEX_CACHE_DIR = settings.data_prep.index_cache_dir
+INCREMENTAL = settings.data_prep.incremental
+FEATURE_CACHE = settings.data_prep.feature_cache
+CHUNK_ROWS = settings.data_prep.chunk_rows
+PREP_PROCESSES = settings.data_prep.prep_processes
+STORAGE_FORMAT = settings.data_prep.storage_format
+PARQUET_COMPRESSION = settings.data_prep.parquet_compression
 
 # Logging configuration
 LOG_LEVEL = "INFO"
@@ -49,6 +49,17 @@ def get_models_dir() -> Path:
     models_dir.mkdir(parents=True, exist_ok=True)
     return models_dir
 
+def get_cache_dir() -> Path:
+    """Get the cache directory path.
+
+    Returns:
+        Path to cache directory
+
+    """
+    cache_dir = get_output_dir() / "cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
 def ensure_dir(path: str | Path) -> Path:
     """Ensure a directory exists and return its Path.
     
@@ -1,10 +1,30 @@
 """Spatial analysis utilities."""
 
+import json
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import scipy
 from scipy.spatial import cKDTree
 
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+from sua_outsmarting_outbreaks.utils.spatial_backends import (
+    EXACT_BACKENDS,
+    SPATIAL_BACKENDS,
+    BallTreeBackend,
+    GridBackend,
+    build_backend,
+    resolve_backend,
+)
+from sua_outsmarting_outbreaks.utils.spatial_cache import array_hash, cached_index
+
+logger = setup_logger(__name__)
+
 
 def find_nearest_locations(
     source_df: pd.DataFrame,
@@ -28,20 +48,10 @@ def find_nearest_locations(
         Dictionary mapping source IDs to nearest target IDs
 
     """
-    # Create KD-tree for efficient nearest neighbor search
-    tree = cKDTree(target_df[[lat_col, lon_col]].values)
-
-    # Find nearest neighbors
-    nearest = {}
-    for _, row in source_df.iterrows():
-        dist, idx = tree.query([row["Transformed_Latitude"],
-                              row["Transformed_Longitude"]])
-
-        # Only include if within distance threshold
-        if max_distance is None or dist <= max_distance:
-            nearest[row["ID"]] = target_df.iloc[idx][id_col]
-
-    return nearest
+    target = SpatialTarget("target", target_df, lat_col, lon_col, id_col=id_col)
+    matches = spatial_join(source_df, [target], max_distance=max_distance)
+    matched = (matches["target_nearest_row"] >= 0).to_numpy()
+    return dict(zip(source_df["ID"].to_numpy()[matched], matches["target_nearest_id"].to_numpy()[matched], strict=True))
 
 def calculate_distances(
     source_df: pd.DataFrame,
@@ -58,13 +68,806 @@ def calculate_distances(
         lon_col: Name of longitude column
 
     Returns:
-        Array of distances between each source-target pair
+        Array with the distance from each source point to its nearest target point
+
+    """
+    target = SpatialTarget("target", target_df, lat_col, lon_col)
+    matches = spatial_join(source_df, [target], lat_col=lat_col, lon_col=lon_col)
+    return matches["target_nearest_distance"].to_numpy()
+
+
+# Mean Earth radius used to convert chord lengths on the unit sphere to kilometres
+EARTH_RADIUS_KM = 6371.0088
+
+# "planar" queries the coordinates as given, "geodesic" treats them as lat/lon degrees
+COORDINATE_MODES = ("planar", "geodesic")
+
+
+def to_unit_vectors(points: np.ndarray) -> np.ndarray:
+    """Embed latitude/longitude pairs as 3D unit vectors.
+
+    Euclidean (chord) distance between unit vectors increases monotonically with
+    great-circle distance, so a regular KD-tree over the embedding returns the
+    exact great-circle nearest neighbours.
+
+    Args:
+        points: Array of shape (n, 2) with latitude and longitude in degrees
+
+    Returns:
+        Array of shape (n, 3) with the unit vectors (NaN rows stay NaN)
+
+    """
+    lat, lon = np.radians(points[:, 0]), np.radians(points[:, 1])
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Convert chord lengths between unit vectors to great-circle kilometres (inf stays inf)."""
+    chord = np.asarray(chord, dtype=float)
+    finite = np.isfinite(chord)
+    return np.where(finite, 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.where(finite, chord, 0) / 2, 0, 1)), chord)
+
+
+def km_to_chord(km: np.ndarray) -> np.ndarray:
+    """Convert great-circle kilometres to chord lengths between unit vectors."""
+    return 2 * np.sin(np.minimum(np.asarray(km, dtype=float) / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+def month_year_to_period(month_year: pd.Series) -> np.ndarray:
+    """Convert ``{month}_{year}`` labels to integer month periods.
+
+    Args:
+        month_year: Series of labels such as ``"1_2019"``
+
+    Returns:
+        Array of ``year * 12 + month - 1`` values, -1 where the label cannot be parsed
+
+    """
+    codes, labels = pd.factorize(month_year)
+    parts = pd.Series(labels, dtype=str).str.split("_", n=1, expand=True).reindex(columns=[0, 1])
+    months = pd.to_numeric(parts[0], errors="coerce")
+    years = pd.to_numeric(parts[1], errors="coerce")
+    label_periods = (years * 12 + months - 1).fillna(-1).to_numpy(dtype=np.int64)
+    return np.where(codes >= 0, label_periods[codes], -1)
+
+
+def year_month_to_period(year: pd.Series, month: pd.Series) -> np.ndarray:
+    """Convert separate year and month columns to integer month periods.
+
+    Args:
+        year: Series of calendar years
+        month: Series of month numbers (1-12)
+
+    Returns:
+        Array of ``year * 12 + month - 1`` values, -1 where either value is missing
+
+    """
+    periods = pd.to_numeric(year, errors="coerce") * 12 + pd.to_numeric(month, errors="coerce") - 1
+    return periods.fillna(-1).to_numpy(dtype=np.int64)
+
+
+# Distinct query points per radius query, which bounds the distance pairs held at once
+BALL_QUERY_BATCH = 8192
+
+# Array fields of the cKDTree pickle state, in state order (the rest are scalars or None).
+# The state is private to scipy, so saved trees record the scipy version and are
+# only restored when the running scipy produces the same layout.
+_TREE_STATE_ARRAYS = {0: "buffer", 1: "data", 5: "maxes", 6: "mins", 7: "indices"}
+_TREE_STATE_LENGTH = 10
+
+
+def _tree_state_matches(state: tuple | list) -> bool:
+    """Check that a cKDTree pickle state has the layout ``save_kdtree`` expects."""
+    return len(state) == _TREE_STATE_LENGTH and all(
+        isinstance(value, np.ndarray) == (position in _TREE_STATE_ARRAYS) for position, value in enumerate(state)
+    )
+
+
+def save_kdtree(tree: cKDTree, directory: Path, name: str) -> None:
+    """Save a built KD-tree as ``.npy`` arrays that can be memory-mapped back.
+
+    Trees whose state does not have the expected layout are not saved and are
+    rebuilt on first use after loading.
+
+    Args:
+        tree: Built KD-tree
+        directory: Directory to write the arrays to
+        name: File name prefix for this tree
 
     """
-    source_coords = source_df[[lat_col, lon_col]].values
-    target_coords = target_df[[lat_col, lon_col]].values
+    state = tree.__getstate__()
+    if not _tree_state_matches(state):
+        logger.warning(f"Unexpected cKDTree state layout in scipy {scipy.__version__}, not saving {name}")
+        return
+    for position, field in _TREE_STATE_ARRAYS.items():
+        np.save(directory / f"{name}.{field}.npy", state[position])
+    scalars = [None if position in _TREE_STATE_ARRAYS else value for position, value in enumerate(state)]
+    (directory / f"{name}.json").write_text(json.dumps({"scipy": scipy.__version__, "state": scalars}))
+
+
+def load_kdtree(directory: Path, name: str, *, mmap: bool = True) -> cKDTree | None:
+    """Load a KD-tree saved by ``save_kdtree`` without rebuilding it.
+
+    Args:
+        directory: Directory the arrays were written to
+        name: File name prefix of the tree
+        mmap: Memory-map the arrays instead of reading them into memory
+
+    Returns:
+        The restored KD-tree, or None when it was saved by another scipy version
+        or its state layout does not match
+
+    """
+    metadata = json.loads((directory / f"{name}.json").read_text())
+    if not isinstance(metadata, dict) or metadata.get("scipy") != scipy.__version__:
+        logger.warning(f"Saved tree {name} was built with another scipy version, rebuilding it")
+        return None
+    state = list(metadata["state"])
+    if len(state) != _TREE_STATE_LENGTH:
+        logger.warning(f"Saved tree {name} has an unexpected state layout, rebuilding it")
+        return None
+    for position, field in _TREE_STATE_ARRAYS.items():
+        state[position] = np.load(directory / f"{name}.{field}.npy", mmap_mode="r" if mmap else None)
+    tree = cKDTree.__new__(cKDTree)
+    tree.__setstate__(tuple(state))
+    if not _tree_state_matches(tree.__getstate__()):
+        logger.warning(f"Saved tree {name} has an unexpected state layout, rebuilding it")
+        return None
+    return tree
+
+
+class MonthYearIndex:
+    """Spatial index partitioned into one nearest-neighbour structure per month period.
+
+    Trees are built lazily the first time a period is queried and reused for
+    every later query, so each lookup only searches the sites of one month.
+    """
+
+    def __init__(self, points: np.ndarray, periods: np.ndarray, backend: str = "auto") -> None:
+        """Group reference locations by period.
+
+        Args:
+            points: Array of shape (n, d) with reference coordinates
+            periods: Array of n integer month periods (see ``month_year_to_period``)
+            backend: Nearest-neighbour backend for the period trees (see ``SPATIAL_BACKENDS``)
+
+        Raises:
+            ValueError: If the backend is not recognised
+
+        """
+        if backend not in SPATIAL_BACKENDS:
+            raise ValueError(f"Unknown spatial backend: {backend}")
+        valid = np.flatnonzero(np.isfinite(points).all(axis=1) & (periods >= 0))
+        order = valid[np.argsort(periods[valid], kind="stable")]
+        bucket_periods, starts = np.unique(periods[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+
+        self._points = points
+        self._order = order
+        bounds = zip(starts.tolist(), stops.tolist(), strict=True)
+        self._bounds = dict(zip(bucket_periods.tolist(), bounds, strict=True))
+        # Resolved once here so an unusable backend is reported once per index, not per period
+        self._backend = resolve_backend(points, backend)
+        self._trees: dict[int, cKDTree | BallTreeBackend | GridBackend] = {}
+
+    @property
+    def periods(self) -> list[int]:
+        """Periods that have at least one reference location."""
+        return sorted(self._bounds)
+
+    def rows(self, period: int) -> np.ndarray:
+        """Return the reference row positions belonging to a period."""
+        start, stop = self._bounds[period]
+        return self._order[start:stop]
+
+    def tree(self, period: int, n_queries: int | None = None) -> cKDTree | BallTreeBackend | GridBackend:
+        """Return the tree for a period, building it on first use.
+
+        Args:
+            period: Month period with reference locations
+            n_queries: Number of points about to be queried, which guides the 'auto' backend
+
+        Returns:
+            The period's nearest-neighbour structure
+
+        """
+        if period not in self._trees:
+            self._trees[period] = build_backend(self._points[self.rows(period)], self._backend, n_queries)
+        return self._trees[period]
+
+    def build_all(self) -> None:
+        """Build the trees of every period up front."""
+        for period in self._bounds:
+            self.tree(period)
+
+    def save(self, directory: Path) -> None:
+        """Save the index with all its trees as ``.npy`` arrays.
+
+        Only KD-trees are stored; the other backends are cheap to build and are
+        rebuilt from the saved points on first use after loading.
+
+        Args:
+            directory: Existing directory to write the index to
+
+        """
+        self.build_all()
+        np.save(directory / "points.npy", self._points)
+        np.save(directory / "order.npy", self._order)
+        for period, tree in self._trees.items():
+            if isinstance(tree, cKDTree):
+                save_kdtree(tree, directory, f"tree_{period}")
+        bounds = [[period, start, stop] for period, (start, stop) in self._bounds.items()]
+        (directory / "index.json").write_text(json.dumps({"backend": self._backend, "bounds": bounds}))
+
+    @classmethod
+    def load(cls, directory: Path, *, mmap: bool = True) -> "MonthYearIndex":
+        """Load an index saved by ``save`` without rebuilding any KD-tree.
+
+        Args:
+            directory: Directory the index was written to
+            mmap: Memory-map the arrays so parallel workers share them through the page cache
+
+        Returns:
+            The restored index
+
+        """
+        mmap_mode = "r" if mmap else None
+        index = cls.__new__(cls)
+        index._points = np.load(directory / "points.npy", mmap_mode=mmap_mode)
+        index._order = np.load(directory / "order.npy", mmap_mode=mmap_mode)
+        metadata = json.loads((directory / "index.json").read_text())
+        index._backend = metadata["backend"]
+        index._bounds = {period: (start, stop) for period, start, stop in metadata["bounds"]}
+        # Trees that are missing or cannot be restored are rebuilt on first use
+        trees = {
+            period: load_kdtree(directory, f"tree_{period}", mmap=mmap)
+            for period in index._bounds
+            if (directory / f"tree_{period}.json").exists()
+        }
+        index._trees = {period: tree for period, tree in trees.items() if tree is not None}
+        return index
+
+    def resolve(self, period: int, month_window: int = 0) -> int | None:
+        """Find the closest period with reference locations within a month window.
+
+        Args:
+            period: Requested month period
+            month_window: Maximum number of months to fall back in either direction
+
+        Returns:
+            The matching period, preferring earlier months on ties, or None
+
+        """
+        for offset in range(month_window + 1):
+            for candidate in (period - offset, period + offset):
+                if candidate in self._bounds:
+                    return candidate
+        return None
+
+    def _groups(
+        self, points: np.ndarray, periods: np.ndarray, month_window: int
+    ) -> Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+        """Group query points by the period they resolve to.
+
+        Hospital coordinates repeat for every disease, so each group carries its
+        distinct coordinates and the inverse index that broadcasts results back.
+
+        Yields:
+            Tuples of (resolved period, member positions, unique points, inverse index)
+
+        """
+        finite = np.isfinite(points).all(axis=1)
+        for period in np.unique(periods[finite]).tolist():
+            bucket = self.resolve(period, month_window)
+            if bucket is None:
+                continue
+            members = np.flatnonzero(finite & (periods == period))
+            unique_points, inverse = np.unique(points[members], axis=0, return_inverse=True)
+            yield bucket, members, unique_points, inverse.reshape(-1)
+
+    def query(
+        self,
+        points: np.ndarray,
+        periods: np.ndarray,
+        *,
+        month_window: int = 0,
+        workers: int = -1,
+        max_distance: float | None = None,
+        k: int = 1,
+        eps: float = 0.0,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the nearest reference locations from the same period for each point.
+
+        Args:
+            points: Array of shape (n, d) with query coordinates
+            periods: Array of n integer month periods for the query points
+            month_window: Months to fall back in either direction when a period has no sites
+            workers: Number of worker threads for the KD-tree queries
+            max_distance: Optional cutoff (inclusive); points with no location within it are left unmatched
+            k: Number of neighbours to return per point
+            eps: Approximation factor of the KD-tree queries; returned neighbours are at most
+                ``1 + eps`` times farther than the true ones (the other backends are always exact)
+
+        Returns:
+            Tuple of (distances, rows) arrays, where rows are positions in the reference
+            table and -1 marks points without a match. Both have shape (n,) when ``k`` is 1
+            and (n, k) otherwise, with neighbours ordered by distance.
+
+        """
+        shape = len(points) if k == 1 else (len(points), k)
+        distances = np.full(shape, np.inf)
+        rows = np.full(shape, -1, dtype=np.int64)
+        # Trees only return neighbours strictly closer than the bound; keep ones exactly at the cutoff
+        upper_bound = np.inf if max_distance is None else np.nextafter(max_distance, np.inf)
+
+        for bucket, members, unique_points, inverse in self._groups(points, periods, month_window):
+            tree = self.tree(bucket, len(unique_points))
+            # Only the KD-tree approximates and threads its queries; the other backends are exact
+            options = {"eps": eps, "workers": workers} if isinstance(tree, cKDTree) else {}
+            unique_distances, local = tree.query(unique_points, k=k, distance_upper_bound=upper_bound, **options)
+            # Missing neighbours (beyond the cutoff or past the tree size) come back as inf and ``tree.n``
+            bucket_rows = np.append(self.rows(bucket), -1)
+            distances[members] = unique_distances[inverse]
+            rows[members] = bucket_rows[local[inverse]]
+
+        return distances, rows
+
+    def exact_distances(
+        self, points: np.ndarray, periods: np.ndarray, month_window: int = 0, bounds: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Compute exact nearest distances without building any tree.
+
+        Meant for validating approximate queries on a small sample of points. Each
+        period's locations are sorted along the first axis once, and every point
+        only scans the slab within its bound (e.g. its approximate distance, which
+        can only overestimate the true one).
+
+        Args:
+            points: Array of shape (n, d) with query coordinates
+            periods: Array of n integer month periods for the query points
+            month_window: Months to fall back in either direction when a period has no sites
+            bounds: Optional array of n upper bounds on the nearest distance (inf scans everything)
+
+        Returns:
+            Array of n distances, inf for points without a matching period
+
+        """
+        bounds = np.full(len(points), np.inf) if bounds is None else bounds
+        distances = np.full(len(points), np.inf)
+        for bucket, members, unique_points, inverse in self._groups(points, periods, month_window):
+            reference = self._points[self.rows(bucket)]
+            reference = reference[np.argsort(reference[:, 0])]
+            unique_bounds = np.full(len(unique_points), -np.inf)
+            np.maximum.at(unique_bounds, inverse, bounds[members] * (1 + 1e-9) + 1e-12)
+            nearest = np.empty(len(unique_points))
+            for i, (point, bound) in enumerate(zip(unique_points, unique_bounds, strict=True)):
+                lo, hi = 0, len(reference)
+                if np.isfinite(bound):
+                    lo = np.searchsorted(reference[:, 0], point[0] - bound, side="left")
+                    hi = np.searchsorted(reference[:, 0], point[0] + bound, side="right")
+                slab = reference[lo:hi] if hi > lo else reference
+                nearest[i] = np.sqrt(((slab - point) ** 2).sum(axis=1).min())
+            distances[members] = nearest[inverse]
+        return distances
+
+    def count_within(
+        self,
+        points: np.ndarray,
+        periods: np.ndarray,
+        radii: np.ndarray,
+        month_window: int = 0,
+        workers: int = -1,
+    ) -> np.ndarray:
+        """Count the reference locations from the same period within each radius of every point.
+
+        Each tree is searched once at the largest radius for all distinct points
+        (a dual-tree ``sparse_distance_matrix`` pass per batch). The distances of
+        the sites found are binned against the sorted radii, and the count within
+        each radius is the cumulative size of the bins up to it.
+
+        Args:
+            points: Array of shape (n, d) with query coordinates
+            periods: Array of n integer month periods for the query points
+            radii: Array of k radii
+            month_window: Months to fall back in either direction when a period has no sites
+            workers: Number of worker threads for the KD-tree queries
+
+        Returns:
+            Array of shape (n, k) with the counts, 0 for points without a matching period
+
+        """
+        radii = np.asarray(radii, dtype=float)
+        order = np.argsort(radii)
+        sorted_radii = radii[order]
+        counts = np.zeros((len(points), len(radii)), dtype=np.int32)
+        if not len(radii):
+            return counts
+
+        def count_batch(tree: cKDTree | BallTreeBackend | GridBackend, batch: np.ndarray) -> np.ndarray:
+            """Count the sites within every sorted radius of a batch of distinct points."""
+            pairs = tree.sparse_distance_matrix(cKDTree(batch), sorted_radii[-1], output_type="ndarray")
+            # Smallest radius holding each site, so the bins accumulate into the counts per radius
+            bins = np.searchsorted(sorted_radii, pairs["v"])
+            sizes = np.bincount(pairs["j"] * len(radii) + bins, minlength=len(batch) * len(radii))
+            return sizes.reshape(len(batch), -1).cumsum(axis=1)
+
+        threads = (os.cpu_count() or 1) if workers < 1 else workers
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="count-within") as executor:
+            for bucket, members, unique_points, inverse in self._groups(points, periods, month_window):
+                tree = self.tree(bucket, len(unique_points))
+                batches = [
+                    unique_points[start : start + BALL_QUERY_BATCH]
+                    for start in range(0, len(unique_points), BALL_QUERY_BATCH)
+                ]
+                bucket_counts = np.concatenate(list(executor.map(count_batch, [tree] * len(batches), batches)))
+                counts[np.ix_(members, order)] = bucket_counts[inverse]
+
+        return counts
+
+
+def idw_aggregate(values: np.ndarray, rows: np.ndarray, distances: np.ndarray, power: float = 2.0) -> np.ndarray:
+    """Average reference values over k neighbours with inverse-distance weights.
+
+    Args:
+        values: Array of shape (m, c) with the numeric columns of the reference table
+        rows: Array of shape (n, k) with neighbour row positions, -1 for missing neighbours
+        distances: Array of shape (n, k) with the matching neighbour distances
+        power: Exponent of the inverse-distance weights
+
+    Returns:
+        Array of shape (n, c) with the weighted means; NaN values are skipped and rows
+        without any valid neighbour value are NaN. A neighbour at distance zero takes
+        effectively all of the weight.
+
+    """
+    valid = rows >= 0
+    weights = np.where(valid, 1.0 / np.maximum(distances, 1e-12) ** power, 0.0)
+    safe_rows = np.where(valid, rows, 0)
+    result = np.full((len(rows), values.shape[1]), np.nan)
+    # One column at a time keeps the gathered block at (n, k) instead of (n, k, c)
+    for col in range(values.shape[1]):
+        gathered = values[safe_rows, col]
+        present = valid & ~np.isnan(gathered)
+        column_weights = np.where(present, weights, 0.0)
+        total = column_weights.sum(axis=1)
+        weighted = (np.where(present, gathered, 0.0) * column_weights).sum(axis=1)
+        np.divide(weighted, total, out=result[:, col], where=total > 0)
+    return result
+
+
+@dataclass
+class SpatialTarget:
+    """Reference table joined onto query rows by ``spatial_join``.
+
+    Attributes:
+        name: Prefix of the output columns (e.g. 'toilet')
+        df: Reference locations; output row ids are positions in this frame
+        lat_col: Name of the latitude column in ``df``
+        lon_col: Name of the longitude column in ``df``
+        id_col: Optional column whose value is reported for the matched row
+        month_year_col: Optional ``{month}_{year}`` column restricting matches to the same month
+
+    """
+
+    name: str
+    df: pd.DataFrame
+    lat_col: str
+    lon_col: str
+    id_col: str | None = None
+    month_year_col: str | None = None
+
+
+def _index_periods(periods: np.ndarray | None, n: int) -> np.ndarray:
+    """Return the periods of an index, putting all points in period 0 when none are given."""
+    return np.zeros(n, dtype=np.int64) if periods is None else periods
+
+
+def measure_recall(
+    exact_index: MonthYearIndex,
+    points: np.ndarray,
+    periods: np.ndarray,
+    distances: np.ndarray,
+    *,
+    month_window: int,
+    max_distance: float | None,
+    sample: int,
+    rng: np.random.Generator,
+) -> float:
+    """Measure the share of sampled points whose approximate match is a true nearest neighbour.
+
+    Args:
+        exact_index: Index over the full reference set (its trees are never built)
+        points: Array of shape (n, d) with the query coordinates
+        periods: Array of n integer month periods for the query points
+        distances: Nearest distances returned by the approximate query
+        month_window: Month window used by the query
+        max_distance: Distance cutoff used by the query
+        sample: Number of query points to check
+        rng: Random generator for the sample
+
+    Returns:
+        Recall between 0 and 1 (1 when no sampled point has a match)
+
+    """
+    positions = rng.choice(len(points), size=min(sample, len(points)), replace=False)
+    approximate = distances[positions]
+    exact = exact_index.exact_distances(points[positions], periods[positions], month_window, approximate)
+    # Points without any reference location within the cutoff cannot be matched and are not scored
+    scored = exact <= (np.inf if max_distance is None else max_distance)
+    if not scored.any():
+        return 1.0
+    hits = approximate[scored] <= exact[scored] * (1 + 1e-9) + 1e-12
+    return float(hits.mean())
+
+
+def cached_month_year_index(
+    points: np.ndarray, periods: np.ndarray, cache_dir: Path, backend: str = "auto"
+) -> MonthYearIndex:
+    """Load a per-period index from the index cache, building and storing it on a miss.
+
+    Args:
+        points: Array of shape (n, d) with reference coordinates
+        periods: Array of n integer month periods
+        cache_dir: Root directory of the index cache
+        backend: Nearest-neighbour backend of the period trees
+
+    Returns:
+        Index with all period trees built
+
+    """
+    entry = Path(cache_dir) / f"month_year_{backend}_{array_hash(points, periods)}"
+    return cached_index(entry, lambda: MonthYearIndex(points, periods, backend), MonthYearIndex.load)
+
+
+def build_index(
+    points: np.ndarray,
+    periods: np.ndarray | None = None,
+    cache_dir: Path | None = None,
+    backend: str = "auto",
+) -> MonthYearIndex:
+    """Build the spatial index of a reference table, or load it from the index cache.
+
+    Args:
+        points: Array of shape (n, d) with reference coordinates
+        periods: Optional array of n integer month periods; without it a single tree covers all points
+        cache_dir: Optional spatial index cache directory
+        backend: Nearest-neighbour backend of the period trees
+
+    Returns:
+        Index over the reference locations
+
+    """
+    periods = _index_periods(periods, len(points))
+    if cache_dir is None:
+        return MonthYearIndex(points, periods, backend)
+    return cached_month_year_index(points, periods, cache_dir, backend)
+
+
+def _reference_points(
+    position: int,
+    target: SpatialTarget,
+    embed: Callable[[np.ndarray], np.ndarray],
+    sample_fraction: float,
+) -> tuple[np.random.Generator, np.ndarray, np.ndarray, np.ndarray | None]:
+    """Compute the points and periods a target's index is built from.
+
+    Returns:
+        Tuple of (random generator of the target, embedded points, indexed points with
+        the locations dropped by subsampling set to NaN, month periods or None)
+
+    """
+    rng = np.random.default_rng([0, position])
+    exact_points = embed(target.df[[target.lat_col, target.lon_col]].to_numpy(dtype=float))
+    target_points = exact_points
+    if sample_fraction < 1:
+        # Dropped locations are masked out, so row ids still refer to the full table
+        keep = rng.random(len(target_points)) < sample_fraction
+        target_points = np.where(keep[:, None], target_points, np.nan)
+    target_periods = None
+    if target.month_year_col is not None:
+        target_periods = month_year_to_period(target.df[target.month_year_col])
+    return rng, exact_points, target_points, target_periods
+
+
+def build_target_indexes(
+    targets: list[SpatialTarget],
+    cache_dir: Path,
+    *,
+    coordinate_mode: str = "planar",
+    sample_fraction: float = 1.0,
+    backend: str = "auto",
+) -> None:
+    """Build the indexes ``spatial_join`` uses for the targets and store them in the index cache.
+
+    Processes that later join against the same targets memory-map the cached
+    files instead of building or receiving their own copies.
+
+    Args:
+        targets: Reference tables, in the order they are passed to ``spatial_join``
+        cache_dir: Spatial index cache directory
+        coordinate_mode: Coordinate mode of the later joins
+        sample_fraction: Reference sample fraction of the later joins
+        backend: Nearest-neighbour backend of the later joins
+
+    """
+    embed = to_unit_vectors if coordinate_mode == "geodesic" else (lambda coords: coords)
+    for position, target in enumerate(targets):
+        _, _, target_points, target_periods = _reference_points(position, target, embed, sample_fraction)
+        build_index(target_points, target_periods, cache_dir, backend)
+
+
+def _nearest_columns(target: SpatialTarget, distances: np.ndarray, rows: np.ndarray) -> dict[str, np.ndarray]:
+    """Build the nearest-match columns of one target from its query results.
+
+    Args:
+        target: Joined reference table
+        distances: Query distances, of shape (n,) or (n, k) for k nearest neighbours
+        rows: Matching row ids (-1 when unmatched), with the shape of ``distances``
+
+    Returns:
+        The ``{name}_nearest_*`` columns, preceded by the ``{name}_knn_*`` columns when k > 1
+
+    """
+    columns = {}
+    row_dtype = np.int32 if len(target.df) < np.iinfo(np.int32).max else np.int64
+    if rows.ndim > 1:
+        for j in range(rows.shape[1]):
+            columns[f"{target.name}_knn_row_{j}"] = rows[:, j].astype(row_dtype)
+            columns[f"{target.name}_knn_distance_{j}"] = distances[:, j]
+        # The first neighbour is the nearest match
+        distances, rows = distances[:, 0], rows[:, 0]
+    columns[f"{target.name}_nearest_row"] = rows.astype(row_dtype)
+    columns[f"{target.name}_nearest_distance"] = distances
+    if target.id_col is not None:
+        matched = rows >= 0
+        ids = np.full(len(rows), None, dtype=object)
+        ids[matched] = target.df[target.id_col].to_numpy()[rows[matched]]
+        columns[f"{target.name}_nearest_id"] = ids
+    return columns
+
+
+def _count_columns(target: SpatialTarget, radii: list[float], counts: np.ndarray) -> dict[str, np.ndarray]:
+    """Name the radius count columns of one target.
+
+    Args:
+        target: Joined reference table
+        radii: Sorted radii, in the caller's distance unit
+        counts: Array of shape (n, len(radii)) returned by ``count_within``
+
+    Returns:
+        One ``{name}_within_{radius}`` column per radius
+
+    """
+    return {f"{target.name}_within_{radius:g}": column for radius, column in zip(radii, counts.T, strict=True)}
+
+
+def spatial_join(
+    query_df: pd.DataFrame,
+    targets: list[SpatialTarget],
+    *,
+    lat_col: str = "Transformed_Latitude",
+    lon_col: str = "Transformed_Longitude",
+    month_window: int = 0,
+    max_distance: float | None = None,
+    radii: list[float] | None = None,
+    k: int = 1,
+    coordinate_mode: str = "planar",
+    backend: str = "auto",
+    eps: float = 0.0,
+    sample_fraction: float = 1.0,
+    recall_sample: int = 1000,
+    workers: int = -1,
+    cache_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Find the nearest location of every target table for each query row.
+
+    One index is built per target (per month period for temporal targets) and
+    each target is resolved with a single batched query over the distinct query
+    coordinates, so the cost no longer grows with per-row Python loops. The
+    targets are joined concurrently in threads, since building and querying the
+    trees releases the GIL, and their columns are assembled in a single step.
+
+    Args:
+        query_df: DataFrame with the query locations (and ``Year``/``Month`` for temporal targets)
+        targets: Reference tables to join
+        lat_col: Name of the latitude column in ``query_df``
+        lon_col: Name of the longitude column in ``query_df``
+        month_window: Months to fall back in either direction for temporal targets
+        max_distance: Optional cutoff; rows with no location within it are left unmatched
+        radii: Optional radii; for each one a ``{name}_within_{radius}`` column counts the
+            target locations within that distance, using the same index as the nearest match
+        k: Number of neighbours per target; when above 1, ``{name}_knn_row_{j}`` and
+            ``{name}_knn_distance_{j}`` columns are added for ``j`` in ``range(k)``
+        coordinate_mode: 'planar' for Euclidean distances on the coordinates as given, or
+            'geodesic' to treat them as lat/lon degrees; distances, ``max_distance`` and
+            ``radii`` are then great-circle kilometres
+        backend: Nearest-neighbour backend (see ``SPATIAL_BACKENDS``); 'auto' picks one per
+            period tree from its size and spread
+        eps: Approximation factor for the KD-tree queries (0 is exact); ignored, with a
+            warning, by the 'balltree' and 'grid' backends
+        sample_fraction: Share of each target's locations kept in the index; below 1 the
+            index is built over a random subsample
+        recall_sample: Number of query rows checked against an exact brute-force search
+            when ``eps`` or ``sample_fraction`` make the join approximate
+        workers: Thread budget for the join (-1 uses all cores), split between targets
+            processed concurrently and the worker threads of each KD-tree query
+        cache_dir: Optional spatial index cache directory
+
+    Returns:
+        DataFrame aligned with ``query_df`` holding ``{name}_nearest_row`` (positional row id,
+        -1 when unmatched), ``{name}_nearest_distance`` (inf when unmatched) and, for targets
+        with an ``id_col``, ``{name}_nearest_id`` for every target, plus one
+        ``{name}_within_{radius}`` count column per radius when ``radii`` are given.
+        For approximate joins ``attrs["recall"]`` maps each target to the share of sampled
+        rows whose match is a true nearest neighbour.
+
+    Raises:
+        ValueError: If the coordinate mode is not recognised
+
+    """
+    if coordinate_mode not in COORDINATE_MODES:
+        raise ValueError(f"Unknown coordinate mode: {coordinate_mode}")
+    geodesic = coordinate_mode == "geodesic"
+    embed = to_unit_vectors if geodesic else (lambda coords: coords)
+    upper_bound = km_to_chord(max_distance) if geodesic and max_distance is not None else max_distance
+    radii = sorted(radii or [])
+    query_radii = km_to_chord(radii) if geodesic else np.asarray(radii, dtype=float)
+
+    if eps > 0 and backend in EXACT_BACKENDS and not (geodesic and backend == "grid"):
+        logger.warning(f"eps={eps} is ignored by the exact {backend} backend")
+    approximate = eps > 0 or sample_fraction < 1
+    points = embed(query_df[[lat_col, lon_col]].to_numpy(dtype=float))
+    query_periods = None
+    if any(target.month_year_col is not None for target in targets):
+        query_periods = year_month_to_period(query_df["Year"], query_df["Month"])
+
+    # Split the thread budget between the targets; tree builds and queries release the GIL
+    budget = (os.cpu_count() or 1) if workers < 1 else workers
+    concurrent = max(1, min(budget, len(targets)))
+    query_workers = max(1, budget // concurrent)
+
+    def join_target(position: int, target: SpatialTarget) -> tuple[dict[str, np.ndarray], float | None]:
+        """Build the index of one target and compute all of its output columns."""
+        rng, exact_points, target_points, target_periods = _reference_points(position, target, embed, sample_fraction)
+        if target.month_year_col is not None:
+            periods, window = query_periods, month_window
+        else:
+            periods, window = np.zeros(len(points), dtype=np.int64), 0
+        index = build_index(target_points, target_periods, cache_dir, backend)
+
+        distances, rows = index.query(
+            points, periods, month_window=window, workers=query_workers, max_distance=upper_bound, k=k, eps=eps
+        )
+        target_recall = None
+        if approximate:
+            exact_index = MonthYearIndex(exact_points, _index_periods(target_periods, len(exact_points)))
+            nearest = distances if k == 1 else distances[:, 0]
+            target_recall = measure_recall(
+                exact_index,
+                points,
+                periods,
+                nearest,
+                month_window=window,
+                max_distance=upper_bound,
+                sample=recall_sample,
+                rng=rng,
+            )
+            logger.info(f"Approximate {target.name} join: recall {target_recall:.2%} on a sample")
+
+        columns = _nearest_columns(target, chord_to_km(distances) if geodesic else distances, rows)
+        if radii:
+            counts = index.count_within(points, periods, query_radii, month_window=window, workers=query_workers)
+            columns.update(_count_columns(target, radii, counts))
+        return columns, target_recall
 
-    tree = cKDTree(target_coords)
-    distances, _ = tree.query(source_coords)
+    with ThreadPoolExecutor(max_workers=concurrent, thread_name_prefix="spatial-join") as executor:
+        results = list(executor.map(join_target, range(len(targets)), targets))
 
-    return distances
+    # Assemble every target's columns in one step, in target order
+    columns = {name: values for target_columns, _ in results for name, values in target_columns.items()}
+    recall = {target.name: target_recall for target, (_, target_recall) in zip(targets, results, strict=True)}
+    result = pd.DataFrame(columns, index=query_df.index)
+    if approximate:
+        result.attrs["recall"] = recall
+    return result
@@ -0,0 +1,392 @@
+"""Nearest-neighbour backends for the spatial index.
+
+Every backend exposes the subset of the ``cKDTree`` interface the spatial
+join relies on: the ``n`` attribute, ``query(x, k, distance_upper_bound)`` and
+``sparse_distance_matrix(other, max_distance, output_type="ndarray")``.
+Missing neighbours are reported like ``cKDTree`` does, with an infinite
+distance and the out-of-range index ``n``. Unlike ``cKDTree``, the adapters
+always search exactly and take no ``eps`` or ``workers``.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from sklearn.neighbors import BallTree
+
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SPATIAL_BACKENDS = ("auto", "kdtree", "balltree", "grid")
+
+# Backends whose searches are always exact and single-threaded
+EXACT_BACKENDS = ("balltree", "grid")
+
+# Number of coordinates per point the grid can index
+GRID_DIMENSIONS = 2
+
+# Below this many points any backend builds in milliseconds, so the KD-tree is used
+GRID_MIN_POINTS = 100_000
+
+# The grid builds faster but answers queries more slowly than the KD-tree, so it is only
+# chosen when the points clearly outnumber the queries that will be made against them
+GRID_MAX_QUERY_RATIO = 0.05
+
+# Minimum share of occupied cells (at one expected point per cell) for the grid to be chosen;
+# uniform data occupies about 1 - 1/e of the cells, clustered data far fewer
+GRID_MIN_OCCUPANCY = 0.5
+
+
+def _cell_size(extent: np.ndarray, target_cells: float) -> float:
+    """Size square cells so a bounding box of the given extent holds about ``target_cells`` cells."""
+    # The second term keeps thin boxes from producing a huge number of cells along the long side
+    cell = max(np.sqrt(extent[0] * extent[1] / target_cells), extent.max() / target_cells)
+    return float(cell) if cell > 0 else 1.0
+
+
+def _pairs(rows: np.ndarray, queries: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    """Pack matches into the record array ``cKDTree.sparse_distance_matrix`` returns for ``output_type="ndarray"``."""
+    pairs = np.empty(len(rows), dtype=[("i", np.intp), ("j", np.intp), ("v", np.float64)])
+    pairs["i"], pairs["j"], pairs["v"] = rows, queries, distances
+    return pairs
+
+
+def _squeeze(distances: np.ndarray, indices: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return 1D results for ``k == 1`` like ``cKDTree.query``."""
+    if k == 1:
+        return distances[:, 0], indices[:, 0]
+    return distances, indices
+
+
+def _merge_best(
+    best_distances: np.ndarray,
+    best_indices: np.ndarray,
+    *,
+    scan: np.ndarray,
+    owner: np.ndarray,
+    distances: np.ndarray,
+    indices: np.ndarray,
+) -> None:
+    """Merge candidate neighbours into the running best k of each query, in place.
+
+    Args:
+        best_distances: Array of shape (m, k) with the best distances so far, ascending
+        best_indices: Array of shape (m, k) with the matching point indices
+        scan: Query positions the candidates were gathered for
+        owner: Position in ``scan`` of each candidate, in ascending order
+        distances: Candidate distances
+        indices: Candidate point indices; ties are broken by the lower index like ``cKDTree``
+
+    """
+    if not len(owner):
+        return
+    k = best_distances.shape[1]
+    if k == 1:
+        # Per-query minimum over the sorted owner groups, without sorting the candidates
+        starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+        group_min = np.minimum.reduceat(distances, starts)
+        at_min = distances == np.repeat(group_min, np.diff(np.r_[starts, len(owner)]))
+        group_index = np.minimum.reduceat(np.where(at_min, indices, np.iinfo(np.int64).max), starts)
+        rows = scan[owner[starts]]
+        current = best_distances[rows, 0]
+        better = (group_min < current) | ((group_min == current) & (group_index < best_indices[rows, 0]))
+        best_distances[rows[better], 0] = group_min[better]
+        best_indices[rows[better], 0] = group_index[better]
+        return
+
+    merged_owner = np.concatenate([np.repeat(np.arange(len(scan)), k), owner])
+    merged_distances = np.concatenate([best_distances[scan].ravel(), distances])
+    merged_indices = np.concatenate([best_indices[scan].ravel(), indices])
+    order = np.lexsort((merged_indices, merged_distances, merged_owner))
+    merged_owner = merged_owner[order]
+    rank = np.arange(len(order)) - np.searchsorted(merged_owner, np.arange(len(scan)))[merged_owner]
+    top = rank < k
+    best_distances[scan[merged_owner[top]], rank[top]] = merged_distances[order][top]
+    best_indices[scan[merged_owner[top]], rank[top]] = merged_indices[order][top]
+
+
+class BallTreeBackend:
+    """Adapter exposing an sklearn ``BallTree`` through the ``cKDTree`` query interface."""
+
+    def __init__(self, points: np.ndarray) -> None:
+        """Build the ball tree.
+
+        Args:
+            points: Array of shape (n, d) with reference coordinates
+
+        """
+        self.n = len(points)
+        self._tree = BallTree(points)
+
+    def query(
+        self, x: np.ndarray, k: int = 1, distance_upper_bound: float = np.inf
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the exact k nearest points closer than ``distance_upper_bound``."""
+        distances, indices = self._tree.query(x, k=min(k, self.n))
+        if distances.shape[1] < k:
+            missing = k - distances.shape[1]
+            distances = np.pad(distances, ((0, 0), (0, missing)), constant_values=np.inf)
+            indices = np.pad(indices, ((0, 0), (0, missing)), constant_values=self.n)
+        beyond = distances >= distance_upper_bound
+        distances[beyond] = np.inf
+        indices[beyond] = self.n
+        return _squeeze(distances, indices, k)
+
+    def sparse_distance_matrix(self, other: cKDTree, max_distance: float, output_type: str = "ndarray") -> np.ndarray:
+        """List the (point, query point, distance) pairs within ``max_distance``.
+
+        Raises:
+            NotImplementedError: If ``output_type`` is not 'ndarray'
+
+        """
+        if output_type != "ndarray":
+            raise NotImplementedError("BallTreeBackend only supports output_type='ndarray'")
+        rows, distances = self._tree.query_radius(other.data, max_distance, return_distance=True)
+        lengths = np.fromiter(map(len, rows), dtype=np.intp, count=len(rows))
+        queries = np.repeat(np.arange(len(rows)), lengths)
+        return _pairs(np.concatenate([*rows, []]), queries, np.concatenate([*distances, []]))
+
+
+class GridBackend:
+    """Uniform grid spatial hash over 2D points.
+
+    Points are bucketed into square cells sized for a few points each and
+    stored in cell order (CSR layout), so building is a single sort. Queries
+    scan rings of cells around each query point, all active queries at once,
+    until no unscanned cell can hold a closer point.
+    """
+
+    def __init__(self, points: np.ndarray, points_per_cell: float = 2.0) -> None:
+        """Bucket the points into grid cells.
+
+        Args:
+            points: Array of shape (n, 2) with finite reference coordinates
+            points_per_cell: Expected number of points per cell for uniform data
+
+        Raises:
+            ValueError: If the points are not two-dimensional
+
+        """
+        points = np.asarray(points, dtype=float)
+        if points.shape[1:] != (GRID_DIMENSIONS,):
+            raise ValueError("The grid backend only supports 2D points")
+
+        self.n = len(points)
+        self._origin = points.min(axis=0) if self.n else np.zeros(2)
+        extent = np.ptp(points, axis=0) if self.n else np.zeros(2)
+        self._cell = _cell_size(extent, max(self.n / points_per_cell, 1.0))
+        self._shape = (np.floor(extent / self._cell) + 1).astype(np.int64)
+
+        cells = self._cell_ids(self._cells_of(points))
+        order = np.argsort(cells, kind="stable")
+        self._order = order
+        self._points = points[order]
+        self._starts = np.searchsorted(cells[order], np.arange(self._shape.prod() + 1))
+
+    def _cells_of(self, x: np.ndarray) -> np.ndarray:
+        """Return the integer cell coordinates of points (may fall outside the grid)."""
+        return np.floor((x - self._origin) / self._cell).astype(np.int64)
+
+    def _cell_ids(self, cells: np.ndarray) -> np.ndarray:
+        """Flatten in-grid cell coordinates to cell ids."""
+        return cells[:, 0] * self._shape[1] + cells[:, 1]
+
+    @staticmethod
+    def _ring_offsets(ring: int) -> np.ndarray:
+        """Return the cell offsets at Chebyshev distance ``ring`` from the centre cell."""
+        if ring == 0:
+            return np.zeros((1, 2), dtype=np.int64)
+        side = np.arange(-ring, ring + 1)
+        inner = side[1:-1]
+        return np.concatenate(
+            [
+                np.column_stack([np.full(len(side), -ring), side]),
+                np.column_stack([np.full(len(side), ring), side]),
+                np.column_stack([inner, np.full(len(inner), -ring)]),
+                np.column_stack([inner, np.full(len(inner), ring)]),
+            ]
+        )
+
+    def _ring_candidates(
+        self, x: np.ndarray, cells: np.ndarray, ring: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Gather the points stored in one ring of cells around each query point.
+
+        Args:
+            x: Array of shape (a, 2) with the active query points
+            cells: Array of shape (a, 2) with their cell coordinates
+            ring: Chebyshev ring to scan
+
+        Returns:
+            Tuple of (owner, positions, distances): the query each candidate belongs to,
+            the candidate's position in the cell-ordered points and its distance
+
+        """
+        ring_cells = cells[:, None, :] + self._ring_offsets(ring)[None]
+        inside = ((ring_cells >= 0) & (ring_cells < self._shape)).all(axis=2)
+        owner, offset = np.nonzero(inside)
+        ids = self._cell_ids(ring_cells[owner, offset])
+        starts, counts = self._starts[ids], self._starts[ids + 1] - self._starts[ids]
+        owner, starts, counts = owner[counts > 0], starts[counts > 0], counts[counts > 0]
+
+        # Expand each (query, cell) pair into one entry per point in the cell
+        owner = np.repeat(owner, counts)
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+        distances = np.sqrt(((x[owner] - self._points[positions]) ** 2).sum(axis=1))
+        return owner, positions, distances
+
+    def query(
+        self, x: np.ndarray, k: int = 1, distance_upper_bound: float = np.inf
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the exact k nearest points by ring expansion.
+
+        Args:
+            x: Array of shape (m, 2) with query coordinates
+            k: Number of neighbours
+            distance_upper_bound: Only return neighbours closer than this
+
+        Returns:
+            Tuple of (distances, indices) with shape (m,) for ``k == 1`` and (m, k) otherwise
+
+        """
+        x = np.asarray(x, dtype=float)
+        best_distances = np.full((len(x), k), np.inf)
+        best_indices = np.full((len(x), k), self.n, dtype=np.int64)
+        if not self.n or not len(x):
+            return _squeeze(best_distances, best_indices, k)
+
+        cells = self._cells_of(x)
+        # Rings closer than this one do not overlap the grid
+        first_ring = np.maximum(-cells, cells - (self._shape - 1)).clip(min=0).max(axis=1)
+        last_ring = np.maximum(cells, (self._shape - 1) - cells).max(axis=1)
+        active = np.arange(len(x))
+        ring = int(first_ring.min())
+        while active.size:
+            scan = active[first_ring[active] <= ring]
+            owner, positions, distances = self._ring_candidates(x[scan], cells[scan], ring)
+            keep = distances < distance_upper_bound
+            owner, positions, distances = owner[keep], positions[keep], distances[keep]
+
+            _merge_best(
+                best_distances,
+                best_indices,
+                scan=scan,
+                owner=owner,
+                distances=distances,
+                indices=self._order[positions],
+            )
+
+            # Any point outside the scanned block is at least this far from the query
+            low = self._origin + (cells[active] - ring) * self._cell
+            high = self._origin + (cells[active] + ring + 1) * self._cell
+            margin = np.minimum(x[active] - low, high - x[active]).min(axis=1)
+            done = (
+                (best_distances[active, -1] <= margin)
+                | (margin >= distance_upper_bound)
+                | (ring >= last_ring[active])
+            )
+            active = active[~done]
+            ring += 1
+
+        return _squeeze(best_distances, best_indices, k)
+
+    def sparse_distance_matrix(self, other: cKDTree, max_distance: float, output_type: str = "ndarray") -> np.ndarray:
+        """List the (point, query point, distance) pairs within ``max_distance``.
+
+        Args:
+            other: KD-tree over the query points
+            max_distance: Radius around every query point
+            output_type: Must be 'ndarray'; only record arrays are supported
+
+        Returns:
+            Record array with fields ``i`` (point), ``j`` (query point) and ``v`` (distance)
+
+        Raises:
+            NotImplementedError: If ``output_type`` is not 'ndarray'
+
+        """
+        if output_type != "ndarray":
+            raise NotImplementedError("GridBackend only supports output_type='ndarray'")
+        x = np.asarray(other.data, dtype=float)
+        if not self.n or not len(x):
+            return _pairs(np.empty(0), np.empty(0), np.empty(0))
+
+        cells = self._cells_of(x)
+        found = []
+        for ring in range(int(np.ceil(max_distance / self._cell)) + 1):
+            owner, positions, distances = self._ring_candidates(x, cells, ring)
+            within = distances <= max_distance
+            found.append((self._order[positions[within]], owner[within], distances[within]))
+        return _pairs(*(np.concatenate(parts) for parts in zip(*found, strict=True)))
+
+
+def select_backend(points: np.ndarray, n_queries: int | None = None) -> str:
+    """Choose a backend from the point count and how evenly the points fill their bounding box.
+
+    Args:
+        points: Array of shape (n, d) with finite reference coordinates
+        n_queries: Expected number of query points, if known
+
+    Returns:
+        'grid' for large, roughly uniform 2D point sets queried by comparatively few
+        points (where its faster build outweighs its slower queries), otherwise 'kdtree'
+
+    """
+    if points.shape[1:] != (GRID_DIMENSIONS,) or len(points) < GRID_MIN_POINTS:
+        return "kdtree"
+    if n_queries is None or n_queries > GRID_MAX_QUERY_RATIO * len(points):
+        return "kdtree"
+    extent = np.ptp(points, axis=0)
+    if not (extent > 0).all():
+        return "kdtree"
+    cell = _cell_size(extent, len(points))
+    shape = (np.floor(extent / cell) + 1).astype(np.int64)
+    cells = np.floor((points - points.min(axis=0)) / cell).astype(np.int64)
+    occupied = np.count_nonzero(np.bincount(cells[:, 0] * shape[1] + cells[:, 1], minlength=int(shape.prod())))
+    return "grid" if occupied / len(points) >= GRID_MIN_OCCUPANCY else "kdtree"
+
+
+def resolve_backend(points: np.ndarray, backend: str) -> str:
+    """Replace a requested backend that cannot index the points with the KD-tree.
+
+    Args:
+        points: Array of shape (n, d) with reference coordinates
+        backend: One of ``SPATIAL_BACKENDS``
+
+    Returns:
+        The backend, or 'kdtree' (with a warning) when 'grid' is requested for points
+        that are not 2D, such as the unit vectors of the geodesic coordinate mode
+
+    """
+    if backend == "grid" and points.shape[1:] != (GRID_DIMENSIONS,):
+        logger.warning(f"The grid backend only supports 2D points, using the KD-tree for shape {points.shape}")
+        return "kdtree"
+    return backend
+
+
+def build_backend(
+    points: np.ndarray, backend: str = "auto", n_queries: int | None = None
+) -> cKDTree | BallTreeBackend | GridBackend:
+    """Build a nearest-neighbour structure over reference points.
+
+    An explicit 'grid' falls back to the KD-tree for points that are not 2D.
+
+    Args:
+        points: Array of shape (n, d) with finite reference coordinates
+        backend: One of ``SPATIAL_BACKENDS``; 'auto' uses ``select_backend``
+        n_queries: Expected number of query points, used by 'auto'
+
+    Returns:
+        The built structure
+
+    Raises:
+        ValueError: If the backend is not recognised
+
+    """
+    if backend not in SPATIAL_BACKENDS:
+        raise ValueError(f"Unknown spatial backend: {backend}")
+    backend = select_backend(points, n_queries) if backend == "auto" else resolve_backend(points, backend)
+    if backend == "grid":
+        return GridBackend(points)
+    if backend == "balltree":
+        return BallTreeBackend(points)
+    return cKDTree(points)
@@ -0,0 +1,107 @@
+"""Persistent on-disk cache of spatial indexes for the supplementary datasets.
+
+Indexes are keyed by a hash of the coordinates (and periods) they are built
+from and stored as ``.npy`` arrays, so later runs and parallel workers can
+memory-map a built index in milliseconds instead of rebuilding it.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import scipy
+
+from sua_outsmarting_outbreaks.utils.logging_utils import setup_logger
+
+if TYPE_CHECKING:
+    # The spatial module builds its indexes through this cache
+    from sua_outsmarting_outbreaks.utils.spatial import MonthYearIndex
+
+logger = setup_logger(__name__)
+
+# Bump when the on-disk layout changes
+INDEX_CACHE_VERSION = 3
+
+# File written last, marking a complete cache entry
+_COMPLETE_MARKER = "complete"
+
+# Indexes kept in memory by this process, least recently used first
+MAX_LOADED_INDEXES = 8
+_loaded: OrderedDict[Path, "MonthYearIndex"] = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def array_hash(*arrays: np.ndarray) -> str:
+    """Hash the contents, dtypes and shapes of one or more arrays.
+
+    Args:
+        *arrays: Arrays the index is built from
+
+    Returns:
+        Hex digest identifying the arrays, the cache layout and the scipy version
+        whose KD-tree state the entry stores
+
+    """
+    digest = hashlib.blake2b(f"{INDEX_CACHE_VERSION}-{scipy.__version__}".encode(), digest_size=16)
+    for array in arrays:
+        contiguous = np.ascontiguousarray(array)
+        digest.update(f"{contiguous.dtype.str}{contiguous.shape}".encode())
+        digest.update(contiguous.data)
+    return digest.hexdigest()
+
+
+def _publish(entry: Path, write: Callable[[Path], None]) -> None:
+    """Write a cache entry into a temporary directory and move it into place atomically."""
+    staging = entry.with_name(f"{entry.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    write(staging)
+    (staging / _COMPLETE_MARKER).touch()
+    try:
+        staging.rename(entry)
+    except OSError:
+        # Another process or thread published the same entry first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def cached_index(
+    entry: Path, build: Callable[[], "MonthYearIndex"], load: Callable[[Path], "MonthYearIndex"]
+) -> "MonthYearIndex":
+    """Load an index from a cache entry, building and storing it on a miss.
+
+    The most recently used indexes are also kept in memory, so repeated joins
+    against the same points (e.g. one per chunk of hospital rows) reuse them.
+
+    Args:
+        entry: Cache entry directory, named after a hash of the indexed arrays (see ``array_hash``)
+        build: Builds the index on a miss; the built index must provide ``save(directory)``
+        load: Loads the index from a complete entry
+
+    Returns:
+        The cached or freshly built index
+
+    """
+    with _loaded_lock:
+        if entry in _loaded:
+            _loaded.move_to_end(entry)
+            return _loaded[entry]
+
+    if (entry / _COMPLETE_MARKER).exists():
+        logger.debug(f"Spatial index cache hit: {entry}")
+        index = load(entry)
+    else:
+        logger.debug(f"Spatial index cache miss: {entry}")
+        index = build()
+        _publish(entry, index.save)
+
+    with _loaded_lock:
+        _loaded[entry] = index
+        while len(_loaded) > MAX_LOADED_INDEXES:
+            _loaded.popitem(last=False)
+    return index
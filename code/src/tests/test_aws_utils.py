@@ -1,6 +1,6 @@
 """Tests for AWS utility functions."""
 
-from sua_outsmarting_outbreaks.utils.aws_utils import get_data_bucket_name
+from sua_outsmarting_outbreaks.utils.aws_utils import get_data_bucket_name, get_instance_vcpus
 
 
 def test_get_data_bucket_name() -> None:
@@ -8,3 +8,10 @@ def test_get_data_bucket_name() -> None:
     bucket_name = get_data_bucket_name()
     assert isinstance(bucket_name, str)
     assert bucket_name == "sua-outsmarting-outbreaks-challenge-comp"
+
+
+def test_get_instance_vcpus_reads_instance_specs() -> None:
+    """Test the vCPU count comes from INSTANCE_SPECS and unknown types fall back to a positive count."""
+    expected = {"ml.m5.2xlarge": 8, "ml.g4dn.8xlarge": 32}
+    assert {instance_type: get_instance_vcpus(instance_type) for instance_type in expected} == expected
+    assert get_instance_vcpus("ml.unknown") >= 1
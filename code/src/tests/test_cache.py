@@ -0,0 +1,74 @@
+"""Tests for fingerprint-based caching of processed data."""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from sua_outsmarting_outbreaks.data.cache import (
+    changed_periods,
+    clear_manifest,
+    input_fingerprint,
+    is_cached,
+    period_fingerprints,
+    read_manifest,
+    settings_fingerprint,
+    write_manifest,
+)
+from sua_outsmarting_outbreaks.data.schema import RAW_FILES
+from sua_outsmarting_outbreaks.data.storage import write_processed
+
+
+def _write_inputs(data_dir: Path) -> None:
+    """Write placeholder raw input files."""
+    for filename in RAW_FILES.values():
+        (data_dir / filename).write_text("a,b\n1,2\n")
+
+
+def test_fingerprint_changes_with_input_metadata(tmp_path: Path) -> None:
+    """Test the fingerprint is stable for unchanged inputs and changes when a file changes."""
+    _write_inputs(tmp_path)
+    fingerprint = input_fingerprint(tmp_path)
+    assert input_fingerprint(tmp_path) == fingerprint
+
+    toilets = tmp_path / RAW_FILES["toilets"]
+    toilets.write_text("a,b\n1,2\n3,4\n")
+    os.utime(toilets, (1, 1))
+    assert input_fingerprint(tmp_path) != fingerprint
+
+
+def test_is_cached_requires_matching_manifest_and_data(tmp_path: Path) -> None:
+    """Test a cache hit needs the same fingerprint, format and an existing dataset."""
+    assert not is_cached(tmp_path, "abc", "parquet")
+
+    write_processed(pd.DataFrame({"ID": ["a"], "Year": [2022], "Month": [1]}), tmp_path, fmt="parquet")
+    write_manifest(tmp_path, "abc", "parquet")
+    assert is_cached(tmp_path, "abc", "parquet")
+    assert not is_cached(tmp_path, "def", "parquet")
+    assert not is_cached(tmp_path, "abc", "csv")
+
+    clear_manifest(tmp_path)
+    assert not is_cached(tmp_path, "abc", "parquet")
+
+
+def test_period_fingerprints_follow_month_window() -> None:
+    """Test a supplementary change only alters the months whose join window covers it."""
+    hospitals = pd.DataFrame({"ID": ["a", "b", "c"], "Year": [2020, 2020, 2020], "Month": [1, 2, 4]})
+    toilets = pd.DataFrame({"toilet_Month_Year": ["1_2020", "3_2020"], "toilet_tp": [0.5, 0.5]})
+    before = period_fingerprints(hospitals, {"toilet": toilets}, month_window=1)
+
+    toilets.loc[1, "toilet_tp"] = 0.75
+    after = period_fingerprints(hospitals, {"toilet": toilets}, month_window=1)
+
+    assert [period for period in before if before[period] != after[period]] == [str(2020 * 12 + 1), str(2020 * 12 + 3)]
+
+
+def test_changed_periods_requires_matching_settings(tmp_path: Path) -> None:
+    """Test changed and removed months are reported only against a manifest with the same settings."""
+    write_manifest(tmp_path, "abc", "parquet", settings=settings_fingerprint(), periods={"1": "x", "2": "y"})
+    manifest = read_manifest(tmp_path)
+
+    assert changed_periods(manifest, "parquet", {"1": "x", "3": "z"}) == ([3], [2])
+    assert changed_periods(manifest, "csv", {"1": "x"}) is None
+    assert changed_periods({**manifest, "settings": "other"}, "parquet", {"1": "x"}) is None
+    assert changed_periods(None, "parquet", {"1": "x"}) is None
@@ -0,0 +1,50 @@
+"""Tests for the selectable CSV engines."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from sua_outsmarting_outbreaks.data.csv_reader import iter_csv, read_csv
+from sua_outsmarting_outbreaks.data.data_prep import read_input
+
+CSV = (
+    "ID,Total,Disease,Month,Year,Transformed_Latitude\n"
+    "a,1.5,Typhoid,1,2020,0.25\n"
+    ",,Cholera,2,2020,\n"
+    "c,3.0,Typhoid,3,2021,1.5\n"
+    "d,4.0,Malaria,4,2021,2.0\n"
+    "e,5.0,Cholera,5,2022,2.5\n"
+)
+
+
+def test_engines_read_the_same_frame(tmp_path: Path) -> None:
+    """Test the pyarrow engine returns the values and dtypes of the pandas parser."""
+    path = tmp_path / "Train.csv"
+    path.write_text(CSV)
+
+    expected = read_input(path, "train", engine="pandas")
+    arrow = read_input(path, "train", engine="pyarrow")
+
+    pd.testing.assert_frame_equal(arrow, expected)
+    assert arrow["Disease"].cat.categories.tolist() == ["Cholera", "Malaria", "Typhoid"]
+    assert isinstance(arrow["ID"].array, pd.arrays.ArrowStringArray)
+    assert arrow["ID"].isna().tolist() == [False, True, False, False, False]
+    projected = read_input(path, "train", usecols=["ID", "Year", "missing"], engine="pyarrow")
+    assert projected.columns.tolist() == ["ID", "Year"]
+    with pytest.raises(ValueError, match="Unsupported CSV engine"):
+        read_csv(path, engine="polars")
+
+
+def test_engines_yield_the_same_chunks(tmp_path: Path) -> None:
+    """Test chunked reads split the rows identically and only keep each chunk's categories."""
+    path = tmp_path / "Train.csv"
+    path.write_text(CSV)
+    dtype = {"Disease": "category", "Total": "float32"}
+
+    expected = list(iter_csv(path, 2, dtype=dtype, engine="pandas"))
+    chunks = list(iter_csv(path, 2, dtype=dtype, engine="pyarrow"))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    for chunk, reference in zip(chunks, expected, strict=True):
+        pd.testing.assert_frame_equal(chunk, reference.reset_index(drop=True))
@@ -0,0 +1,59 @@
+"""Tests for the supplementary spatio-temporal cube."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sua_outsmarting_outbreaks.data.cube import cube_features, update_cube
+
+
+def _sites(rows: list[tuple[str, float, float, float]]) -> pd.DataFrame:
+    """Build a small supplementary table with one measurement column."""
+    return pd.DataFrame(
+        rows, columns=["toilet_Month_Year", "toilet_Transformed_Latitude", "toilet_Transformed_Longitude", "toilet_tp"]
+    )
+
+
+def test_cube_lookup_aggregates_cells_per_month(tmp_path: Path) -> None:
+    """Test hospitals read the count and mean of their own cell in their own month."""
+    sites = _sites(
+        [
+            ("1_2020", 0.2, 0.2, 1.0),
+            ("1_2020", 0.7, 0.9, 3.0),
+            ("1_2020", 1.5, 0.5, np.nan),
+            ("2_2020", 0.5, 0.5, 10.0),
+        ]
+    )
+    cube = update_cube(sites, "toilet", tmp_path, cell_size=1.0)
+    hospitals = pd.DataFrame(
+        {
+            "Transformed_Latitude": [0.5, 1.2, 0.5, 5.0, 0.5],
+            "Transformed_Longitude": [0.5, 0.1, 0.5, 5.0, 0.5],
+            "Year": [2020, 2020, 2020, 2020, 2021],
+            "Month": [1, 1, 2, 1, 1],
+        }
+    )
+
+    features = cube_features(hospitals, cube, "toilet")
+
+    assert features.columns.tolist() == ["toilet_cell_count", "toilet_cell_tp_mean"]
+    np.testing.assert_array_equal(features["toilet_cell_count"], [2, 1, 1, 0, np.nan])
+    np.testing.assert_array_equal(features["toilet_cell_tp_mean"], [2.0, np.nan, 10.0, np.nan, np.nan])
+
+
+def test_cube_update_only_rebuilds_changed_months(tmp_path: Path) -> None:
+    """Test a new month is added without rewriting the months that did not change."""
+    first = _sites([("1_2020", 0.2, 0.2, 1.0), ("2_2020", 0.5, 0.5, 2.0)])
+    update_cube(first, "toilet", tmp_path, cell_size=1.0)
+    january = tmp_path / f"period_{2020 * 12}.npy"
+    written = january.stat().st_mtime_ns
+
+    second = pd.concat([first, _sites([("3_2020", 0.5, 0.5, 4.0)])], ignore_index=True)
+    updated_tp = 5.0
+    second.loc[1, "toilet_tp"] = updated_tp
+    cube = update_cube(second, "toilet", tmp_path, cell_size=1.0)
+
+    assert january.stat().st_mtime_ns == written
+    assert cube.periods == [2020 * 12, 2020 * 12 + 1, 2020 * 12 + 2]
+    assert cube.month(2020 * 12 + 1)[0, 0, 1] == updated_tp
@@ -2,7 +2,33 @@
 
 from pathlib import Path
 
-from sua_outsmarting_outbreaks.data.data_prep import get_data_dir
+import numpy as np
+import pandas as pd
+import pytest
+
+from sua_outsmarting_outbreaks.data import data_prep
+from sua_outsmarting_outbreaks.data.data_prep import (
+    find_nearest,
+    get_data_dir,
+    process_data,
+    read_input,
+    read_inputs,
+    stream_process_data,
+)
+from sua_outsmarting_outbreaks.data.schema import RAW_FILES, apply_raw_schema
+from sua_outsmarting_outbreaks.data.storage import read_processed, write_processed
+from sua_outsmarting_outbreaks.utils.spatial import SpatialTarget, spatial_join
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep the on-by-default caches of the join out of the repository's output directory."""
+    index_dir = tmp_path / "spatial_index"
+    feature_dir = tmp_path / "features"
+    index_dir.mkdir()
+    feature_dir.mkdir()
+    monkeypatch.setattr(data_prep, "get_index_cache_dir", lambda: index_dir)
+    monkeypatch.setattr(data_prep, "get_feature_cache_dir", lambda: feature_dir)
 
 
 def test_get_data_dir() -> None:
@@ -10,3 +36,297 @@ def test_get_data_dir() -> None:
     data_dir = get_data_dir()
     assert isinstance(data_dir, Path)
     assert data_dir.name == "data"
+
+
+def test_read_input_applies_declared_schema(tmp_path: Path) -> None:
+    """Test raw inputs are read with compact declared dtypes and optional projection."""
+    path = tmp_path / "toilets.csv"
+    path.write_text(
+        "toilet_Month_Year,toilet_Transformed_Latitude,toilet_Transformed_Longitude,toilet_2t,toilet_count,"
+        "toilet_offset,toilet_note\n"
+        "1_2020,0.5,1.5,290.1,3,-1,x\n"
+        "2_2020,,2.5,291.2,250,2,y\n",
+    )
+
+    toilets = read_input(path, "toilets")
+    assert toilets["toilet_Month_Year"].dtype == "category"
+    assert toilets["toilet_Transformed_Latitude"].dtype == "float32"
+    assert toilets["toilet_2t"].dtype == "float32"
+    assert toilets["toilet_count"].dtype == "int16"
+    assert toilets["toilet_offset"].dtype == "int64"
+
+    projected = read_input(path, "toilets", usecols=["toilet_Month_Year", "toilet_2t", "missing"])
+    assert projected.columns.tolist() == ["toilet_Month_Year", "toilet_2t"]
+
+
+def test_read_inputs_reports_missing_file(tmp_path: Path) -> None:
+    """Test concurrent loading re-raises the error of a missing input file."""
+    (tmp_path / "Train.csv").write_text("ID,Year,Month\na,2020,1\n")
+    with pytest.raises(FileNotFoundError):
+        read_inputs(tmp_path)
+
+
+def test_find_nearest_matches_brute_force() -> None:
+    """Test the batched KD-tree lookup returns the brute-force nearest IDs."""
+    rng = np.random.default_rng(0)
+    hospitals = pd.DataFrame(
+        {
+            "ID": [f"ID_{i}" for i in range(40)],
+            "Transformed_Latitude": rng.uniform(0, 10, 40),
+            "Transformed_Longitude": rng.uniform(0, 10, 40),
+        },
+    )
+    sites = pd.DataFrame(
+        {
+            "site_Transformed_Latitude": rng.uniform(0, 10, 25),
+            "site_Transformed_Longitude": rng.uniform(0, 10, 25),
+            "site_id": [f"S{i}" for i in range(25)],
+        },
+    )
+
+    nearest = find_nearest(hospitals, sites, "site_Transformed_Latitude", "site_Transformed_Longitude", "site_id")
+
+    hospital_xy = hospitals[["Transformed_Latitude", "Transformed_Longitude"]].to_numpy()
+    site_xy = sites[["site_Transformed_Latitude", "site_Transformed_Longitude"]].to_numpy()
+    expected = np.linalg.norm(hospital_xy[:, None, :] - site_xy[None, :, :], axis=2).argmin(axis=1)
+    assert nearest.index.equals(hospitals.index)
+    assert nearest.tolist() == sites["site_id"].to_numpy()[expected].tolist()
+
+
+def test_find_nearest_broadcasts_repeated_locations() -> None:
+    """Test repeated hospital coordinates share a match and missing coordinates stay unmatched."""
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a", "b", "c", "d"],
+            "Transformed_Latitude": [0.0, 5.0, 0.0, np.nan],
+            "Transformed_Longitude": [0.0, 5.0, 0.0, 1.0],
+        },
+        index=[10, 11, 12, 13],
+    )
+    sites = pd.DataFrame(
+        {
+            "site_Transformed_Latitude": [0.1, 4.9],
+            "site_Transformed_Longitude": [0.1, 4.9],
+            "site_id": ["near_origin", "near_five"],
+        },
+    )
+
+    nearest = find_nearest(hospitals, sites, "site_Transformed_Latitude", "site_Transformed_Longitude", "site_id")
+
+    assert nearest.loc[[10, 11, 12]].tolist() == ["near_origin", "near_five", "near_origin"]
+    assert pd.isna(nearest.loc[13])
+
+
+def _supplementary(prefix: str, rows: list[tuple[str, float, float, float]]) -> pd.DataFrame:
+    """Build a small supplementary table with one measurement column."""
+    return pd.DataFrame(
+        rows,
+        columns=[
+            f"{prefix}_Month_Year",
+            f"{prefix}_Transformed_Latitude",
+            f"{prefix}_Transformed_Longitude",
+            f"{prefix}_value",
+        ],
+    )
+
+
+def test_process_data_keeps_one_row_per_hospital_row() -> None:
+    """Test duplicate supplementary keys are averaged instead of multiplying hospital rows."""
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a", "b", "c"],
+            "Year": [2020, 2020, 2021],
+            "Month": [1, 1, 6],
+            "Transformed_Latitude": [0.0, 5.0, 0.0],
+            "Transformed_Longitude": [0.0, 5.0, 0.0],
+        },
+    )
+    sites = [("1_2020", 0.0, 0.0, 1.0), ("1_2020", 0.0, 0.0, 3.0), ("1_2020", 5.0, 5.0, 10.0)]
+
+    merged = process_data(
+        hospitals,
+        _supplementary("toilet", sites),
+        _supplementary("waste", sites),
+        _supplementary("water", sites),
+    )
+
+    assert merged["ID"].tolist() == ["a", "b", "c"]
+    assert merged["toilet_value"].tolist()[:2] == [2.0, 10.0]
+    assert pd.isna(merged.loc[2, "water_value"])
+
+
+def test_process_data_row_ids_attach_matched_rows() -> None:
+    """Test the integer row ids attach every column of the matched row and leave unmatched rows empty."""
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a", "b", "c"],
+            "Year": [2020, 2020, 2023],
+            "Month": [1, 1, 1],
+            "Transformed_Latitude": [9.0, 0.0, 0.0],
+            "Transformed_Longitude": [9.0, 0.0, 0.0],
+        },
+    )
+    sites = [("1_2020", 0.0, 0.5, 1.0), ("1_2020", 5.0, 5.0, 2.0), ("1_2020", 9.0, 8.0, 3.0)]
+    toilets = _supplementary("toilet", sites)
+    lat_col, lon_col = "toilet_Transformed_Latitude", "toilet_Transformed_Longitude"
+    target = SpatialTarget("toilet", toilets, lat_col, lon_col, month_year_col="toilet_Month_Year")
+
+    rows = spatial_join(hospitals, [target])["toilet_nearest_row"]
+    merged = process_data(
+        hospitals,
+        toilets,
+        *(_supplementary(prefix, sites) for prefix in ("waste", "water")),
+        include_key=True,
+    )
+
+    assert rows.tolist() == [2, 0, -1]
+    for prefix in ("toilet", "waste", "water"):
+        matched = merged.loc[:1, [f"{prefix}_Transformed_Longitude", f"{prefix}_value"]]
+        assert matched.to_numpy().tolist() == [[8.0, 3.0], [0.5, 1.0]]
+        assert merged[f"{prefix}_Month_Year_lat_lon"].tolist()[:2] == ["1_2020_9.0_8.0", "1_2020_0.0_0.5"]
+        assert merged.loc[2, merged.columns.str.startswith(f"{prefix}_")].isna().all()
+    assert merged["ID"].tolist() == ["a", "b", "c"]
+
+
+def test_process_data_adds_nearest_distance() -> None:
+    """Test the distance to each matched site is kept as a feature and is NaN when unmatched."""
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a", "b"],
+            "Year": [2020, 2021],
+            "Month": [1, 1],
+            "Transformed_Latitude": [3.0, 3.0],
+            "Transformed_Longitude": [4.0, 4.0],
+        },
+    )
+    sites = [("1_2020", 0.0, 0.0, 1.0)]
+
+    merged = process_data(
+        hospitals,
+        _supplementary("toilet", sites),
+        _supplementary("waste", sites),
+        _supplementary("water", sites),
+    )
+
+    for prefix in ("toilet", "waste", "water"):
+        assert merged[f"{prefix}_nearest_distance"].iloc[0] == pytest.approx(5.0)
+        assert pd.isna(merged[f"{prefix}_nearest_distance"].iloc[1])
+
+
+def test_process_data_idw_neighbours_keep_width(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test k-neighbour aggregation averages values by inverse distance without adding columns."""
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a"],
+            "Year": [2020],
+            "Month": [1],
+            "Transformed_Latitude": [0.0],
+            "Transformed_Longitude": [0.0],
+        },
+    )
+    sites = [("1_2020", 1.0, 0.0, 2.0), ("1_2020", 0.0, 2.0, 8.0), ("1_2020", 9.0, 9.0, 100.0)]
+    frames = [_supplementary(prefix, sites) for prefix in ("toilet", "waste", "water")]
+
+    nearest = process_data(hospitals, *(frame.copy() for frame in frames))
+    monkeypatch.setattr(data_prep, "NEIGHBOURS", 2)
+    averaged = process_data(hospitals, *frames)
+
+    assert averaged.columns.tolist() == nearest.columns.tolist()
+    assert averaged["toilet_value"].iloc[0] == pytest.approx((2.0 + 8.0 / 4) / (1 + 1 / 4))
+    assert averaged["toilet_Transformed_Latitude"].iloc[0] == 1.0
+
+
+def test_process_data_reuses_cached_source_columns(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test only the changed source is joined again and the cached columns give the same output."""
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a", "b"],
+            "Year": [2020, 2020],
+            "Month": [1, 1],
+            "Transformed_Latitude": [0.0, 5.0],
+            "Transformed_Longitude": [0.0, 5.0],
+        },
+    )
+    sites = [("1_2020", 0.0, 1.0, 1.0), ("1_2020", 5.0, 4.0, 2.0)]
+    moved = [("1_2020", 0.0, 1.0, 1.0), ("1_2020", 5.0, 6.5, 2.0)]
+
+    def frames() -> list[pd.DataFrame]:
+        return [_supplementary("toilet", sites), _supplementary("waste", moved), _supplementary("water", sites)]
+
+    process_data(hospitals, *(_supplementary(prefix, sites) for prefix in ("toilet", "waste", "water")))
+
+    joined = []
+    spatial_join = data_prep.spatial_join
+
+    def recording_join(query_df: pd.DataFrame, targets: list, **kwargs: object) -> pd.DataFrame:
+        joined.extend(target.name for target in targets)
+        return spatial_join(query_df, targets, **kwargs)
+
+    monkeypatch.setattr(data_prep, "spatial_join", recording_join)
+    cached = process_data(hospitals, *frames())
+    monkeypatch.setattr(data_prep, "get_feature_cache_dir", lambda: None)
+    fresh = process_data(hospitals, *frames())
+
+    assert joined == ["waste", "toilet", "waste", "water"]
+    assert len(list((tmp_path / "features").glob("*.parquet"))) == len(joined)
+    pd.testing.assert_frame_equal(cached, fresh)
+    assert cached["waste_nearest_distance"].iloc[1] == pytest.approx(1.5)
+
+
+def test_stream_process_data_matches_in_memory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test chunked processing writes the same rows, in the same order, as processing everything at once."""
+    monkeypatch.setattr(data_prep, "get_feature_cache_dir", lambda: None)
+    hospitals = pd.DataFrame(
+        {
+            "ID": [f"ID_{i}" for i in range(7)],
+            "Total": [1.0, None, 3.0, 4.0, 5.0, 6.0, 7.0],
+            "Disease": ["Cholera", "Typhoid"] * 3 + ["Cholera"],
+            "Month": [1, 1, 2, 1, 2, 1, 2],
+            "Year": [2020, 2020, 2020, 2020, 2020, 2022, 2022],
+            "Transformed_Latitude": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+            "Transformed_Longitude": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        },
+    )
+    sites = [("1_2020", 0.0, 1.0, 1.0), ("1_2020", 3.0, 3.0, 2.0), ("2_2020", 4.0, 4.0, 3.0), ("1_2022", 5.0, 6.0, 4.0)]
+    hospitals.iloc[:5].to_csv(tmp_path / RAW_FILES["train"], index=False)
+    hospitals.iloc[5:].to_csv(tmp_path / RAW_FILES["test"], index=False)
+    for name, prefix in (("toilets", "toilet"), ("waste_management", "waste"), ("water_sources", "water")):
+        _supplementary(prefix, sites).to_csv(tmp_path / RAW_FILES[name], index=False)
+
+    assert stream_process_data(tmp_path, tmp_path / "chunked", chunk_rows=2) == len(hospitals)
+    frames = {name: read_input(tmp_path / filename, name) for name, filename in RAW_FILES.items()}
+    hospital_data = apply_raw_schema(pd.concat([frames["train"], frames["test"]]), "train")
+    hospital_data["Total"] = hospital_data["Total"].fillna(0)
+    merged = process_data(hospital_data, frames["toilets"], frames["waste_management"], frames["water_sources"])
+    write_processed(merged, tmp_path / "memory")
+
+    pd.testing.assert_frame_equal(read_processed(tmp_path / "chunked"), read_processed(tmp_path / "memory"))
+    assert len(list((tmp_path / "chunked").rglob("*.parquet"))) > len(list((tmp_path / "memory").rglob("*.parquet")))
+
+
+def test_process_data_in_year_partitions_matches_single_process(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the process pool returns the rows of every Year partition in the original order."""
+    monkeypatch.setattr(data_prep, "get_feature_cache_dir", lambda: None)
+    hospitals = pd.DataFrame(
+        {
+            "ID": ["a", "b", "c", "d"],
+            "Year": [2021, 2020, 2021, 2020],
+            "Month": [1, 1, 1, 1],
+            "Transformed_Latitude": [0.0, 1.0, 4.0, 5.0],
+            "Transformed_Longitude": [0.0, 1.0, 4.0, 5.0],
+        },
+    )
+    sites = [("1_2020", 0.0, 0.0, 1.0), ("1_2020", 5.0, 5.0, 2.0), ("1_2021", 1.0, 1.0, 3.0), ("1_2021", 4.0, 4.0, 4.0)]
+
+    def frames() -> list[pd.DataFrame]:
+        return [_supplementary(prefix, sites) for prefix in ("toilet", "waste", "water")]
+
+    single = process_data(hospitals, *frames())
+    monkeypatch.setattr(data_prep, "PREP_PROCESSES", 2)
+    partitioned = process_data(hospitals, *frames())
+
+    pd.testing.assert_frame_equal(partitioned, single)
+    assert partitioned["toilet_value"].tolist() == [3.0, 1.0, 4.0, 2.0]
+    assert any((tmp_path / "spatial_index").iterdir())
@@ -0,0 +1,296 @@
+"""Tests for spatial analysis utilities."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.spatial import cKDTree
+
+from sua_outsmarting_outbreaks.utils.spatial import (
+    EARTH_RADIUS_KM,
+    MonthYearIndex,
+    SpatialTarget,
+    cached_month_year_index,
+    calculate_distances,
+    find_nearest_locations,
+    idw_aggregate,
+    month_year_to_period,
+    spatial_join,
+    year_month_to_period,
+)
+from sua_outsmarting_outbreaks.utils.spatial_backends import build_backend, select_backend
+
+
+def test_month_year_periods_agree() -> None:
+    """Test both period encodings map the same month to the same integer."""
+    labels = pd.Series(["1_2019", "12_2022", "bad", None])
+    periods = month_year_to_period(labels)
+    expected = year_month_to_period(pd.Series([2019, 2022]), pd.Series([1, 12]))
+    assert periods[:2].tolist() == expected.tolist()
+    assert periods[2:].tolist() == [-1, -1]
+
+
+def test_month_year_index_matches_within_period() -> None:
+    """Test queries only match sites from the same period unless a window is allowed."""
+    points = np.array([[0.0, 0.0], [10.0, 10.0], [0.1, 0.1]])
+    periods = month_year_to_period(pd.Series(["1_2020", "1_2020", "3_2020"]))
+    index = MonthYearIndex(points, periods)
+
+    query_points = np.array([[0.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+    query_periods = year_month_to_period(pd.Series([2020, 2020, 2020]), pd.Series([1, 3, 2]))
+
+    _, rows = index.query(query_points, query_periods)
+    assert rows.tolist() == [0, 2, -1]
+
+    _, rows = index.query(query_points, query_periods, month_window=1)
+    assert rows.tolist() == [0, 2, 0]
+
+
+def test_cached_month_year_index_reuses_saved_trees(tmp_path: Path) -> None:
+    """Test a cached index is loaded from disk and answers queries like a fresh one."""
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 10, (200, 2))
+    periods = rng.integers(24240, 24244, 200)
+    query_points = rng.uniform(0, 10, (50, 2))
+    query_periods = rng.integers(24240, 24244, 50)
+
+    fresh = cached_month_year_index(points, periods, tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    loaded = cached_month_year_index(points, periods, tmp_path)
+    expected = MonthYearIndex(points, periods).query(query_points, query_periods)
+    for index in (fresh, loaded):
+        distances, rows = index.query(query_points, query_periods)
+        np.testing.assert_array_equal(rows, expected[1])
+        np.testing.assert_allclose(distances, expected[0])
+
+
+def test_saved_trees_from_another_scipy_are_rebuilt(tmp_path: Path) -> None:
+    """Test trees saved by another scipy version are rebuilt instead of restored."""
+    rng = np.random.default_rng(7)
+    points = rng.uniform(0, 10, (100, 2))
+    periods = rng.integers(24240, 24242, 100)
+    query_points = rng.uniform(0, 10, (20, 2))
+    query_periods = rng.integers(24240, 24242, 20)
+
+    MonthYearIndex(points, periods, "kdtree").save(tmp_path)
+    for metadata_file in tmp_path.glob("tree_*.json"):
+        metadata = json.loads(metadata_file.read_text())
+        metadata_file.write_text(json.dumps({**metadata, "scipy": "0.0.0"}))
+
+    loaded = MonthYearIndex.load(tmp_path)
+    assert loaded._trees == {}
+    expected = MonthYearIndex(points, periods, "kdtree").query(query_points, query_periods)
+    np.testing.assert_array_equal(loaded.query(query_points, query_periods)[1], expected[1])
+
+
+def test_spatial_join_matches_brute_force_with_cutoff() -> None:
+    """Test the join returns the brute-force nearest site and honours the distance cutoff."""
+    rng = np.random.default_rng(1)
+    sites = pd.DataFrame(rng.uniform(0, 10, (40, 2)), columns=["site_lat", "site_lon"])
+    sites["site_id"] = [f"S{i}" for i in range(40)]
+    hospitals = pd.DataFrame(rng.uniform(0, 10, (30, 2)), columns=["Transformed_Latitude", "Transformed_Longitude"])
+    hospitals["ID"] = [f"H{i}" for i in range(30)]
+
+    pairwise = np.linalg.norm(
+        hospitals[["Transformed_Latitude", "Transformed_Longitude"]].to_numpy()[:, None]
+        - sites[["site_lat", "site_lon"]].to_numpy()[None],
+        axis=2,
+    )
+    target = SpatialTarget("site", sites, "site_lat", "site_lon", id_col="site_id")
+
+    matches = spatial_join(hospitals, [target])
+    assert matches["site_nearest_row"].tolist() == pairwise.argmin(axis=1).tolist()
+    np.testing.assert_allclose(matches["site_nearest_distance"], pairwise.min(axis=1))
+    renamed = sites.rename(columns={"site_lat": "Transformed_Latitude", "site_lon": "Transformed_Longitude"})
+    np.testing.assert_allclose(calculate_distances(hospitals, renamed), pairwise.min(axis=1))
+
+    cutoff = float(np.median(pairwise.min(axis=1)))
+    within = pairwise.min(axis=1) <= cutoff
+    matches = spatial_join(hospitals, [target], max_distance=cutoff)
+    assert (matches["site_nearest_row"].to_numpy() >= 0).tolist() == within.tolist()
+    nearest = find_nearest_locations(hospitals, sites, "site_lat", "site_lon", "site_id", max_distance=cutoff)
+    assert nearest == {f"H{i}": f"S{j}" for i, j in enumerate(pairwise.argmin(axis=1)) if within[i]}
+
+
+@pytest.mark.parametrize("backend", ["kdtree", "balltree", "grid"])
+def test_spatial_join_keeps_locations_exactly_at_the_cutoff(backend: str) -> None:
+    """Test a location exactly ``max_distance`` away is matched, as the cutoff is inclusive."""
+    sites = pd.DataFrame({"site_lat": [3.0, 30.0], "site_lon": [4.0, 40.0], "site_id": ["S0", "S1"]})
+    hospitals = pd.DataFrame({"ID": ["H0"], "Transformed_Latitude": [0.0], "Transformed_Longitude": [0.0]})
+    target = SpatialTarget("site", sites, "site_lat", "site_lon", id_col="site_id")
+    cutoff = 5.0
+
+    matches = spatial_join(hospitals, [target], max_distance=cutoff, backend=backend)
+    assert matches["site_nearest_row"].tolist() == [0]
+    assert matches["site_nearest_distance"].tolist() == [cutoff]
+
+
+@pytest.mark.parametrize("backend", ["kdtree", "balltree", "grid"])
+def test_count_within_matches_brute_force(backend: str) -> None:
+    """Test the radius counts agree with pairwise distances for every radius, in the given order, and period."""
+    rng = np.random.default_rng(2)
+    points = rng.uniform(0, 10, (300, 2))
+    periods = rng.integers(24240, 24243, 300)
+    query_points = np.repeat(rng.uniform(0, 10, (20, 2)), 3, axis=0)
+    empty_period = 24245
+    query_periods = np.tile([24240, 24241, empty_period], 20)
+    radii = np.array([1.0, 2.5, 0.5])
+
+    counts = MonthYearIndex(points, periods, backend).count_within(query_points, query_periods, radii)
+
+    pairwise = np.linalg.norm(query_points[:, None] - points[None], axis=2)
+    same_period = query_periods[:, None] == periods[None]
+    expected = np.stack([((pairwise <= radius) & same_period).sum(axis=1) for radius in radii], axis=1)
+    np.testing.assert_array_equal(counts, expected)
+    assert not counts[query_periods == empty_period].any()
+
+
+def test_idw_aggregate_weights_by_inverse_distance() -> None:
+    """Test k-neighbour means use inverse-distance weights and skip missing neighbours and values."""
+    values = np.array([[1.0, np.nan], [3.0, 4.0], [5.0, 6.0]])
+    rows = np.array([[0, 1], [2, -1], [0, 1]])
+    distances = np.array([[1.0, 2.0], [1.0, np.inf], [0.0, 1.0]])
+
+    result = idw_aggregate(values, rows, distances)
+
+    np.testing.assert_allclose(result[0], [(1.0 + 3.0 / 4) / (1 + 1 / 4), 4.0])
+    np.testing.assert_allclose(result[1], [5.0, 6.0])
+    np.testing.assert_allclose(result[2], [1.0, 4.0])
+
+
+def _haversine_km(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in km between (lat, lon) degree arrays."""
+    lat1, lon1 = np.radians(a[:, None, 0]), np.radians(a[:, None, 1])
+    lat2, lon2 = np.radians(b[None, :, 0]), np.radians(b[None, :, 1])
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+
+def test_geodesic_join_matches_haversine() -> None:
+    """Test the unit-vector mode returns the great-circle nearest site and its distance in km."""
+    rng = np.random.default_rng(3)
+    sites = np.column_stack([rng.uniform(55, 80, 200), rng.uniform(-180, 180, 200)])
+    hospitals = np.column_stack([rng.uniform(55, 80, 50), rng.uniform(-180, 180, 50)])
+    site_df = pd.DataFrame(sites, columns=["lat", "lon"])
+    hospital_df = pd.DataFrame(hospitals, columns=["Transformed_Latitude", "Transformed_Longitude"])
+    target = SpatialTarget("site", site_df, "lat", "lon")
+    pairwise = _haversine_km(hospitals, sites)
+
+    radius_km = 500.0
+    matches = spatial_join(hospital_df, [target], coordinate_mode="geodesic", radii=[radius_km])
+    assert matches["site_nearest_row"].tolist() == pairwise.argmin(axis=1).tolist()
+    np.testing.assert_allclose(matches["site_nearest_distance"], pairwise.min(axis=1), rtol=1e-6)
+    assert matches["site_within_500"].tolist() == (pairwise <= radius_km).sum(axis=1).tolist()
+
+    cutoff = float(np.median(pairwise.min(axis=1)))
+    matches = spatial_join(hospital_df, [target], coordinate_mode="geodesic", max_distance=cutoff)
+    assert (matches["site_nearest_row"] >= 0).tolist() == (pairwise.min(axis=1) <= cutoff).tolist()
+
+
+def test_geodesic_join_with_grid_backend_falls_back_to_kdtree() -> None:
+    """Test an explicit grid backend still joins the 3D unit vectors of the geodesic mode."""
+    rng = np.random.default_rng(3)
+    sites = np.column_stack([rng.uniform(55, 80, 200), rng.uniform(-180, 180, 200)])
+    hospitals = np.column_stack([rng.uniform(55, 80, 50), rng.uniform(-180, 180, 50)])
+    site_df = pd.DataFrame(sites, columns=["lat", "lon"])
+    hospital_df = pd.DataFrame(hospitals, columns=["Transformed_Latitude", "Transformed_Longitude"])
+    target = SpatialTarget("site", site_df, "lat", "lon")
+
+    matches = spatial_join(hospital_df, [target], coordinate_mode="geodesic", backend="grid", radii=[500.0])
+    expected = spatial_join(hospital_df, [target], coordinate_mode="geodesic", backend="kdtree", radii=[500.0])
+
+    pd.testing.assert_frame_equal(matches, expected)
+    assert matches["site_nearest_row"].tolist() == _haversine_km(hospitals, sites).argmin(axis=1).tolist()
+    assert isinstance(build_backend(np.ones((3, 3)), "grid"), cKDTree)
+
+
+@pytest.mark.parametrize("backend", ["balltree", "grid"])
+def test_backends_agree_with_kdtree(backend: str) -> None:
+    """Test every backend returns the KD-tree's neighbours, cutoffs and radius pairs."""
+    rng = np.random.default_rng(4)
+    points = rng.uniform(0, 10, (2000, 2))
+    queries = rng.uniform(-2, 12, (500, 2))
+    reference = cKDTree(points)
+    index = build_backend(points, backend)
+
+    for k, bound in [(1, np.inf), (3, np.inf), (2, 0.2)]:
+        expected = reference.query(queries, k=k, distance_upper_bound=bound)
+        distances, rows = index.query(queries, k=k, distance_upper_bound=bound)
+        np.testing.assert_allclose(distances, expected[0])
+        np.testing.assert_array_equal(rows, expected[1])
+
+    query_tree = cKDTree(queries)
+    pairs = np.sort(index.sparse_distance_matrix(query_tree, 0.5), order=["i", "j"])
+    expected_pairs = np.sort(reference.sparse_distance_matrix(query_tree, 0.5, output_type="ndarray"), order=["i", "j"])
+    np.testing.assert_array_equal(pairs[["i", "j"]], expected_pairs[["i", "j"]])
+    np.testing.assert_allclose(pairs["v"], expected_pairs["v"])
+
+
+def test_select_backend_prefers_grid_for_large_uniform_sets() -> None:
+    """Test the grid is only chosen for large, evenly spread sets queried by few points."""
+    rng = np.random.default_rng(5)
+    uniform = rng.uniform(0, 1, (200_000, 2))
+    clustered = rng.normal(0, 1, (200_000, 2)) ** 5
+    assert select_backend(uniform, n_queries=1000) == "grid"
+    assert select_backend(uniform, n_queries=len(uniform)) == "kdtree"
+    assert select_backend(uniform) == "kdtree"
+    assert select_backend(clustered, n_queries=1000) == "kdtree"
+    assert select_backend(rng.uniform(0, 1, (200_000, 3)), n_queries=1000) == "kdtree"
+
+
+def test_cached_grid_index_rebuilds_trees_after_load(tmp_path: Path) -> None:
+    """Test a grid-backed index can be cached and queried after loading."""
+    rng = np.random.default_rng(6)
+    points = rng.uniform(0, 10, (300, 2))
+    periods = rng.integers(24240, 24243, 300)
+    query_points = rng.uniform(0, 10, (40, 2))
+    query_periods = rng.integers(24240, 24243, 40)
+
+    cached_month_year_index(points, periods, tmp_path, "grid")
+    loaded = cached_month_year_index(points, periods, tmp_path, "grid")
+    expected = MonthYearIndex(points, periods, "kdtree").query(query_points, query_periods)
+    np.testing.assert_array_equal(loaded.query(query_points, query_periods)[1], expected[1])
+
+
+def test_approximate_join_reports_recall() -> None:
+    """Test approximate joins report their recall against an exact search and stay within eps."""
+    rng = np.random.default_rng(7)
+    sites = pd.DataFrame(rng.uniform(0, 10, (5000, 2)), columns=["lat", "lon"])
+    hospitals = pd.DataFrame(rng.uniform(0, 10, (2000, 2)), columns=["Transformed_Latitude", "Transformed_Longitude"])
+    target = SpatialTarget("site", sites, "lat", "lon")
+
+    exact = spatial_join(hospitals, [target])
+    assert "recall" not in exact.attrs
+
+    eps = spatial_join(hospitals, [target], eps=0.5, recall_sample=500)
+    assert 0 < eps.attrs["recall"]["site"] <= 1
+    assert (eps["site_nearest_distance"] <= exact["site_nearest_distance"] * 1.5 + 1e-12).all()
+
+    # Dropping half of the sites must show up as lost recall
+    max_sampled_recall = 0.9
+    sampled = spatial_join(hospitals, [target], sample_fraction=0.5, recall_sample=2000)
+    hits = np.isclose(sampled["site_nearest_distance"], exact["site_nearest_distance"]).mean()
+    assert sampled.attrs["recall"]["site"] == pytest.approx(hits)
+    assert sampled.attrs["recall"]["site"] < max_sampled_recall
+
+
+def test_concurrent_join_matches_sequential(tmp_path: Path) -> None:
+    """Test joining several targets in parallel threads gives the sequential result, even with a shared cache."""
+    rng = np.random.default_rng(8)
+    hospitals = pd.DataFrame(rng.uniform(0, 10, (500, 2)), columns=["Transformed_Latitude", "Transformed_Longitude"])
+    hospitals["Year"], hospitals["Month"] = 2020, rng.integers(1, 4, 500)
+    sites = pd.DataFrame(rng.uniform(0, 10, (800, 2)), columns=["lat", "lon"])
+    sites["Month_Year"] = [f"{month}_2020" for month in rng.integers(1, 4, 800)]
+    shuffled = sites.sample(frac=1, random_state=0)
+    targets = [
+        SpatialTarget(name, df, "lat", "lon", month_year_col="Month_Year")
+        for name, df in [("first", sites), ("second", sites), ("other", shuffled)]
+    ]
+
+    sequential = spatial_join(hospitals, targets, radii=[1.0], workers=1)
+    concurrent = spatial_join(hospitals, targets, radii=[1.0], workers=4, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(concurrent, sequential)
+    assert list(concurrent.columns[:2]) == ["first_nearest_row", "first_nearest_distance"]
@@ -0,0 +1,110 @@
+"""Tests for processed dataset storage."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sua_outsmarting_outbreaks.data.schema import apply_processed_schema
+from sua_outsmarting_outbreaks.data.storage import (
+    STORAGE_FORMATS,
+    processed_location,
+    read_processed,
+    split_locations,
+    write_processed,
+)
+
+
+def _processed_frame() -> pd.DataFrame:
+    """Build a small processed dataset spanning training and test years."""
+    return pd.DataFrame(
+        {
+            "ID": ["a", "b", "c", "d"],
+            "Total": [1.0, np.nan, 3.0, 4.0],
+            "Disease": pd.Categorical(["Cholera", "Typhoid", "Cholera", "Typhoid"]),
+            "Month": [1, 2, 1, 2],
+            "Year": [2021, 2022, 2023, 2023],
+            "toilet_tp": [0.25, 0.5, 0.75, 1.0],
+        },
+    )
+
+
+@pytest.mark.parametrize("fmt", STORAGE_FORMATS)
+def test_processed_round_trip_keeps_schema(tmp_path: Path, fmt: str) -> None:
+    """Test both storage formats read back the same values and dtypes."""
+    write_processed(_processed_frame(), tmp_path, fmt=fmt)
+    loaded = read_processed(tmp_path, fmt=fmt).sort_values("ID", ignore_index=True)
+
+    assert (tmp_path / processed_location("processed_train", fmt)).exists()
+    assert loaded["ID"].tolist() == ["a", "b", "c", "d"]
+    assert loaded["Year"].dtype == "int16"
+    assert loaded["Month"].dtype == "int8"
+    assert loaded["toilet_tp"].dtype == "float32"
+    assert loaded["Disease"].tolist() == ["Cholera", "Typhoid", "Cholera", "Typhoid"]
+    assert loaded["Total"].isna().tolist() == [False, True, False, False]
+
+
+@pytest.mark.parametrize("fmt", STORAGE_FORMATS)
+def test_read_processed_filters_years_and_months(tmp_path: Path, fmt: str) -> None:
+    """Test year and month filters select the same rows in both formats."""
+    write_processed(_processed_frame(), tmp_path, fmt=fmt)
+
+    assert sorted(read_processed(tmp_path, fmt=fmt, max_year=2022)["ID"]) == ["a", "b"]
+    assert sorted(read_processed(tmp_path, fmt=fmt, min_year=2023, max_year=2023)["ID"]) == ["c", "d"]
+    assert sorted(read_processed(tmp_path, fmt=fmt, min_year=2022, months=[2])["ID"]) == ["b", "d"]
+
+
+def test_storage_formats_read_identical_frames(tmp_path: Path) -> None:
+    """Test both formats return rows in Year/Month order and columns in the written order."""
+    df = _processed_frame().assign(Month=[10, 2, 1, 2], Year=[2021, 2021, 2023, 2023]).iloc[::-1]
+    for fmt in STORAGE_FORMATS:
+        (tmp_path / fmt).mkdir()
+        write_processed(df, tmp_path / fmt, fmt=fmt)
+
+    for columns in (None, ["toilet_tp", "ID"]):
+        parquet = read_processed(tmp_path / "parquet", columns=columns)
+        pd.testing.assert_frame_equal(parquet, read_processed(tmp_path / "csv", fmt="csv", columns=columns))
+    assert parquet.columns.tolist() == ["ID", "toilet_tp"]
+    full = read_processed(tmp_path / "parquet")
+    assert full.columns.tolist() == df.columns.tolist()
+    assert full["ID"].tolist() == ["b", "a", "c", "d"]
+
+
+def test_processed_schema_does_not_depend_on_values() -> None:
+    """Test count columns get one declared dtype whether a chunk holds small ints, large ints or NaN."""
+    chunks = [
+        pd.DataFrame({"toilet_count": np.array([3, 250], dtype="int16"), "toilet_within_1": [0, 2]}),
+        pd.DataFrame({"toilet_count": [70_000, 1], "toilet_within_1": np.array([1, 0], dtype="int64")}),
+        pd.DataFrame({"toilet_count": [np.nan, 4.0], "toilet_within_1": np.array([5, 0], dtype="int32")}),
+    ]
+
+    dtypes = [apply_processed_schema(chunk).dtypes.astype(str).tolist() for chunk in chunks]
+
+    assert dtypes == [["float32", "int32"]] * len(chunks)
+
+
+def test_write_processed_can_keep_other_partitions(tmp_path: Path) -> None:
+    """Test a non-replacing write only overwrites the partitions it contains."""
+    df = _processed_frame()
+    write_processed(df, tmp_path)
+    updated_year = 2023
+    write_processed(df[df["Year"] == updated_year].assign(Total=0.0), tmp_path, replace=False)
+
+    loaded = read_processed(tmp_path).sort_values("ID", ignore_index=True)
+    assert loaded["Total"].tolist()[1:] == pytest.approx([np.nan, 0.0, 0.0], nan_ok=True)
+
+
+def test_split_locations_keep_the_test_year_out_of_training(tmp_path: Path) -> None:
+    """Test the Parquet training split is listed per training year, without the held-out year."""
+    write_processed(_processed_frame(), tmp_path)
+
+    assert split_locations(tmp_path, "processed_train") == ["processed/Year=2021/", "processed/Year=2022/"]
+    assert split_locations(tmp_path, "processed_test") == ["processed/Year=2023/"]
+    assert split_locations(tmp_path, "processed_train", fmt="csv") == ["processed_train.csv"]
+
+
+def test_processed_location_rejects_unknown_format() -> None:
+    """Test unsupported formats raise a ValueError."""
+    with pytest.raises(ValueError, match="Unsupported storage format"):
+        processed_location("processed_train", "xlsx")